@@ -7,7 +7,8 @@ detects outlier spikes, and removes them from InfluxDB.
 Setup (one-time):
     python3 -m venv scripts/.venv
     source scripts/.venv/bin/activate
-    pip install influxdb-client python-dotenv
+    pip install influxdb-client python-dotenv numpy
+    pip install numba    # optional, faster on multi-month windows
 
 Usage:
     source scripts/.venv/bin/activate
@@ -22,22 +23,29 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
-from dotenv import load_dotenv
-from influxdb_client import InfluxDBClient
+import numpy as np
 
-# Load .env from project root
-load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+# influxdb_client and dotenv are imported in main() after argument parsing,
+# so --help and usage errors don't pay for their import time.
+if TYPE_CHECKING:
+    from influxdb_client import InfluxDBClient
 
-import os
+ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
 
-INFLUXDB_URL = os.environ.get("INFLUXDB_URL", "http://influxdb:8086")
-INFLUXDB_TOKEN = os.environ.get("INFLUXDB_TOKEN", "")
-INFLUXDB_ORG = os.environ.get("INFLUXDB_ORG", "homelab")
-BUCKET = os.environ.get("INFLUXDB_BUCKET", "hass")
+# Connection settings — filled in by _load_settings() from the environment/.env
+INFLUXDB_URL = "http://influxdb:8086"
+INFLUXDB_TOKEN = ""
+INFLUXDB_ORG = "homelab"
+BUCKET = "hass"
 
 # Sensor to fix (without domain prefix, as stored in InfluxDB)
 ENTITY_ID = "shelly3em_main_channel_total_energy"
@@ -56,10 +64,31 @@ RANGE_STOP = "2025-10-08T00:00:00Z"
 # Threshold: a jump between consecutive points larger than this (kWh) is an outlier
 OUTLIER_THRESHOLD_KWH = 500.0
 
+# Windows at least this long use the numba kernel for outlier detection (if installed)
+NUMBA_MIN_POINTS = 1_000_000
+
+# Concurrent DELETE requests when applying fixes (each is one HTTP round-trip)
+DELETE_WORKERS = 8
+
+
+@dataclass
+class SensorSeries:
+    """Sensor points as parallel columns (index i is one data point).
+
+    Missing values are stored as NaN in ``values``.
+    """
+
+    times: list[datetime]
+    values: np.ndarray
+    measurements: list[str]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
 
 def query_sensor_data(
     client: InfluxDBClient, entity_id: str, range_start: str, range_stop: str,
-) -> list[dict]:
+) -> SensorSeries:
     """Query all data points for a sensor in the analysis window."""
     query_api = client.query_api()
     flux = f"""
@@ -67,127 +96,199 @@ from(bucket: "{BUCKET}")
   |> range(start: {range_start}, stop: {range_stop})
   |> filter(fn: (r) => r["entity_id"] == "{entity_id}")
   |> filter(fn: (r) => r["_field"] == "value")
+  |> group()
   |> sort(columns: ["_time"])
 """
-    tables = query_api.query(flux, org=INFLUXDB_ORG)
-    records = []
-    for table in tables:
-        for record in table.records:
-            records.append({
-                "time": record.get_time(),
-                "value": record.get_value(),
-                "measurement": record.get_measurement(),
-            })
-    # Sort by time across all tables (InfluxDB returns separate tables per _measurement)
-    records.sort(key=lambda r: r["time"])
+    # group() merges the per-_measurement tables into one, so the rows arrive
+    # already sorted by time across all series.
+    times: list[datetime] = []
+    vals: list[float] = []
+    measurements: list[str] = []
+    times_append, vals_append, meas_append = times.append, vals.append, measurements.append
+    nan = np.nan
+    # Stream records straight into the columns — no intermediate TableList.
+    # Read the row dict directly rather than via the get_*() accessors.
+    for record in query_api.query_stream(flux, org=INFLUXDB_ORG):
+        v = record.values
+        value = v["_value"]
+        times_append(v["_time"])
+        vals_append(nan if value is None else value)
+        meas_append(v["_measurement"])
+    values = np.fromiter(vals, dtype=np.float64, count=len(vals))
 
     # Deduplicate: InfluxDB stores multiple series (e.g. per-phase tags) for the same
     # entity_id, resulting in 3 records per timestamp (with sub-millisecond differences).
     # Collapse to one per second so neighbor-based outlier detection works correctly.
-    if records:
-        deduped = [records[0]]
-        for r in records[1:]:
-            prev_sec = deduped[-1]["time"].replace(microsecond=0)
-            curr_sec = r["time"].replace(microsecond=0)
+    if times:
+        keep = [0]
+        prev_sec = times[0].replace(microsecond=0)
+        for i in range(1, len(times)):
+            curr_sec = times[i].replace(microsecond=0)
             if curr_sec != prev_sec:
-                deduped.append(r)
-        records = deduped
-
-    return records
-
-
-def find_outliers(records: list[dict], threshold: float) -> list[dict]:
+                keep.append(i)
+                prev_sec = curr_sec
+        times = [times[i] for i in keep]
+        values = values[keep]
+        measurements = [measurements[i] for i in keep]
+
+    return SensorSeries(times=times, values=values, measurements=measurements)
+
+
+def _outlier(
+    series: SensorSeries, i: int, prev_value: float | None, next_value: float | None,
+    jump: float, kind: str,
+) -> dict:
+    return {
+        "index": i,
+        "time": series.times[i],
+        "value": float(series.values[i]),
+        "prev_value": prev_value,
+        "next_value": next_value,
+        "jump": jump,
+        "type": kind,
+        "measurement": series.measurements[i],
+    }
+
+
+def _interior_outliers_numpy(vals: np.ndarray, threshold: float) -> np.ndarray:
+    """Indices of interior points that spike or dip against both neighbours."""
+    curr = vals[1:-1]
+    diff_prev = curr - vals[:-2]
+    diff_next = curr - vals[2:]
+    # NaN (missing value) neighbours compare False, same as the old None skip
+    # Spike: big jump up from previous AND big drop to next
+    is_spike = (diff_prev > threshold) & (diff_next > threshold)
+    # Dip: big drop from previous AND big jump back to next
+    is_dip = (-diff_prev > threshold) & (-diff_next > threshold)
+    return np.flatnonzero(is_spike | is_dip) + 1
+
+
+def _interior_outliers_loop(
+    vals: np.ndarray, threshold: float, out: np.ndarray,
+) -> int:
+    k = 0
+    for i in range(1, vals.shape[0] - 1):
+        diff_prev = vals[i] - vals[i - 1]
+        diff_next = vals[i] - vals[i + 1]
+        if (diff_prev > threshold and diff_next > threshold) or (
+            -diff_prev > threshold and -diff_next > threshold
+        ):
+            out[k] = i
+            k += 1
+    return k
+
+
+@lru_cache(maxsize=1)
+def _numba_kernel() -> Callable[[np.ndarray, float, np.ndarray], int] | None:
+    """JIT-compile the single-pass kernel, or None if numba isn't installed.
+
+    numba is imported here rather than at module load: it takes hundreds of
+    milliseconds and only pays off on windows of NUMBA_MIN_POINTS or more.
+    """
+    try:
+        import numba
+    except ImportError:  # optional — only speeds up very long windows
+        return None
+    return numba.njit(cache=True, boundscheck=False)(_interior_outliers_loop)
+
+
+def _interior_outliers(vals: np.ndarray, threshold: float) -> np.ndarray:
+    # NumPy's diff+mask pass allocates several n-sized temporaries; on very
+    # long windows the single-pass JIT kernel avoids them.
+    if len(vals) < NUMBA_MIN_POINTS:
+        return _interior_outliers_numpy(vals, threshold)
+    kernel = _numba_kernel()
+    if kernel is None:
+        return _interior_outliers_numpy(vals, threshold)
+    out = np.empty(len(vals), dtype=np.int64)
+    k = kernel(vals, threshold, out)
+    return out[:k]
+
+
+def find_outliers(series: SensorSeries, threshold: float) -> list[dict]:
     """Find outlier points where the value jumps abnormally compared to neighbors."""
-    if len(records) < 3:
+    n = len(series)
+    if n < 3:
         return []
 
+    vals = series.values
     outliers = []
-    for i in range(1, len(records) - 1):
-        prev_val = records[i - 1]["value"]
-        curr_val = records[i]["value"]
-        next_val = records[i + 1]["value"]
-
-        if prev_val is None or curr_val is None or next_val is None:
-            continue
-
-        diff_from_prev = curr_val - prev_val
-        diff_from_next = curr_val - next_val
-
-        # Spike: big jump up from previous AND big drop to next
-        is_spike = diff_from_prev > threshold and diff_from_next > threshold
-        # Dip: big drop from previous AND big jump back to next
-        is_dip = -diff_from_prev > threshold and -diff_from_next > threshold
-
-        if is_spike or is_dip:
-            outliers.append({
-                "index": i,
-                "time": records[i]["time"],
-                "value": curr_val,
-                "prev_value": prev_val,
-                "next_value": next_val,
-                "jump": abs(diff_from_prev),
-                "type": "spike" if is_spike else "dip",
-                "measurement": records[i]["measurement"],
-            })
+    for i in _interior_outliers(vals, threshold):
+        i = int(i)
+        prev_val, curr_val, next_val = float(vals[i - 1]), float(vals[i]), float(vals[i + 1])
+        outliers.append(_outlier(
+            series, i, prev_val, next_val, abs(curr_val - prev_val),
+            "spike" if curr_val - prev_val > threshold else "dip",
+        ))
 
     # Also check first and last points
-    if len(records) >= 2:
-        # First point: outlier if far from second in either direction
-        if records[0]["value"] is not None and records[1]["value"] is not None:
-            diff = abs(records[0]["value"] - records[1]["value"])
-            if diff > threshold:
-                outliers.insert(0, {
-                    "index": 0,
-                    "time": records[0]["time"],
-                    "value": records[0]["value"],
-                    "prev_value": None,
-                    "next_value": records[1]["value"],
-                    "jump": diff,
-                    "type": "spike" if records[0]["value"] > records[1]["value"] else "dip",
-                    "measurement": records[0]["measurement"],
-                })
-        # Last point: outlier if far from second-to-last in either direction
-        if records[-1]["value"] is not None and records[-2]["value"] is not None:
-            diff = abs(records[-1]["value"] - records[-2]["value"])
-            if diff > threshold:
-                outliers.append({
-                    "index": len(records) - 1,
-                    "time": records[-1]["time"],
-                    "value": records[-1]["value"],
-                    "prev_value": records[-2]["value"],
-                    "next_value": None,
-                    "jump": diff,
-                    "type": "spike" if records[-1]["value"] > records[-2]["value"] else "dip",
-                    "measurement": records[-1]["measurement"],
-                })
+    # First point: outlier if far from second in either direction
+    first, second = vals[0], vals[1]
+    if not (np.isnan(first) or np.isnan(second)):
+        diff = abs(float(first - second))
+        if diff > threshold:
+            outliers.insert(0, _outlier(
+                series, 0, None, float(second), diff,
+                "spike" if first > second else "dip",
+            ))
+    # Last point: outlier if far from second-to-last in either direction
+    last, before_last = vals[-1], vals[-2]
+    if not (np.isnan(last) or np.isnan(before_last)):
+        diff = abs(float(last - before_last))
+        if diff > threshold:
+            outliers.append(_outlier(
+                series, n - 1, float(before_last), None, diff,
+                "spike" if last > before_last else "dip",
+            ))
 
     return outliers
 
 
-def delete_points(client: InfluxDBClient, entity_id: str, outliers: list[dict]) -> int:
-    """Delete specific outlier data points from InfluxDB."""
+def delete_points(
+    client: InfluxDBClient, entity_id: str, outliers: list[dict],
+    emit: Callable[[str], None] = print,
+) -> int:
+    """Delete specific outlier data points from InfluxDB.
+
+    Each outlier is removed with its own 1-second window (a wider window would
+    also delete the good points between outliers), but the DELETE requests
+    are issued concurrently so their round-trips overlap.
+    """
     delete_api = client.delete_api()
-    deleted = 0
-    for outlier in outliers:
+    # InfluxDB v2 delete only supports tag predicates (not _field)
+    predicate = f'entity_id="{entity_id}"'
+
+    # Outliers within the same second share one delete window. InfluxDB
+    # returns UTC timestamps, so the naive isoformat() is the same string
+    # strftime("%Y-%m-%dT%H:%M:%S") would build, without the format parsing.
+    windows: dict[str, list[dict]] = {}
+    for outlier in sorted(outliers, key=lambda o: o["time"]):
         ts: datetime = outlier["time"]
+        windows.setdefault(ts.replace(microsecond=0, tzinfo=None).isoformat(), []).append(outlier)
+
+    def _delete(second: str) -> None:
         # Use a 1-second window around the exact timestamp
-        start = ts.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-        stop = ts.strftime("%Y-%m-%dT%H:%M:%S.999Z")
-        # InfluxDB v2 delete only supports tag predicates (not _field)
-        predicate = f'entity_id="{entity_id}"'
-
-        try:
-            delete_api.delete(
-                start=start,
-                stop=stop,
-                predicate=predicate,
-                bucket=BUCKET,
-                org=INFLUXDB_ORG,
-            )
-            deleted += 1
-            print(f"  Deleted: {ts.isoformat()} (value: {outlier['value']:.2f})")
-        except Exception as e:
-            print(f"  FAILED to delete {ts.isoformat()}: {e}")
+        delete_api.delete(
+            start=f"{second}.000Z",
+            stop=f"{second}.999Z",
+            predicate=predicate,
+            bucket=BUCKET,
+            org=INFLUXDB_ORG,
+        )
+
+    deleted = 0
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+        futures = [(pool.submit(_delete, second), group) for second, group in windows.items()]
+        for future, group in futures:
+            try:
+                future.result()
+            except Exception as e:
+                for outlier in group:
+                    emit(f"  FAILED to delete {outlier['time'].isoformat()}: {e}")
+                continue
+            deleted += len(group)
+            for outlier in group:
+                emit(f"  Deleted: {outlier['time'].isoformat()} (value: {outlier['value']:.2f})")
 
     return deleted
 
@@ -195,73 +296,80 @@ def delete_points(client: InfluxDBClient, entity_id: str, outliers: list[dict])
 def analyze_and_fix(
     client: InfluxDBClient, entity_id: str, apply: bool,
     range_start: str, range_stop: str, threshold: float,
-    dump: int = 0,
+    dump: int = 0, emit: Callable[[str], None] = print,
 ) -> int:
-    """Analyze one sensor and optionally fix outliers. Returns outlier count."""
-    print(f"\n{'='*60}")
-    print(f"Sensor: {entity_id}")
-    print(f"{'='*60}")
+    """Analyze one sensor and optionally fix outliers. Returns outlier count.
 
-    records = query_sensor_data(client, entity_id, range_start, range_stop)
-    print(f"Data points in window: {len(records)}")
+    All output goes through ``emit`` so concurrent runs can buffer it.
+    """
+    emit(f"\n{'='*60}")
+    emit(f"Sensor: {entity_id}")
+    emit(f"{'='*60}")
+
+    series = query_sensor_data(client, entity_id, range_start, range_stop)
+    emit(f"Data points in window: {len(series)}")
 
     # Count records per _measurement
     meas_counts: dict[str, int] = {}
-    for r in records:
-        m = r["measurement"]
+    for m in series.measurements:
         meas_counts[m] = meas_counts.get(m, 0) + 1
     if len(meas_counts) > 1:
-        print(f"  WARNING: Multiple _measurement values: {meas_counts}")
+        emit(f"  WARNING: Multiple _measurement values: {meas_counts}")
     elif meas_counts:
-        print(f"  _measurement: {list(meas_counts.keys())[0]}")
+        emit(f"  _measurement: {list(meas_counts.keys())[0]}")
+
+    valid_idx = np.flatnonzero(~np.isnan(series.values))
 
-    if dump and records:
-        n = min(dump, len(records))
-        print(f"\n  First {n} data points:")
-        for r in records[:n]:
-            print(f"    {r['time'].isoformat()}  {r['value']:>12.2f}  ({r['measurement']})")
-        if len(records) > n:
-            print(f"  ... ({len(records) - n} more)")
+    if dump and len(series):
+        n = min(dump, len(series))
+        emit(f"\n  First {n} data points:")
+        for i in range(n):
+            emit(f"    {series.times[i].isoformat()}  {series.values[i]:>12.2f}  ({series.measurements[i]})")
+        if len(series) > n:
+            emit(f"  ... ({len(series) - n} more)")
 
         # Also show data around the min value to understand outlier shape
-        values_with_idx = [(i, r["value"]) for i, r in enumerate(records) if r["value"] is not None]
-        if values_with_idx:
-            min_idx, min_val = min(values_with_idx, key=lambda x: x[1])
-            max_idx, max_val = max(values_with_idx, key=lambda x: x[1])
-            median_val = sorted(v for _, v in values_with_idx)[len(values_with_idx) // 2]
+        if len(valid_idx):
+            valid_vals = series.values[valid_idx]
+            min_idx = int(valid_idx[np.argmin(valid_vals)])
+            min_val = float(series.values[min_idx])
+            max_val = float(valid_vals.max())
+            median_val = float(np.sort(valid_vals)[len(valid_vals) // 2])
             # Show context around min if it's far from median (likely an outlier)
             if abs(min_val - median_val) > abs(max_val - median_val) * 0.1:
                 ctx = min(n // 2, 5)
                 start = max(0, min_idx - ctx)
-                end = min(len(records), min_idx + ctx + 1)
-                print(f"\n  Data around minimum ({min_val:.2f}) at index {min_idx}:")
+                end = min(len(series), min_idx + ctx + 1)
+                emit(f"\n  Data around minimum ({min_val:.2f}) at index {min_idx}:")
                 for i in range(start, end):
-                    r = records[i]
                     marker = " <<<" if i == min_idx else ""
-                    print(f"    [{i:>4}] {r['time'].isoformat()}  {r['value']:>12.2f}  ({r['measurement']}){marker}")
+                    emit(
+                        f"    [{i:>4}] {series.times[i].isoformat()}  "
+                        f"{series.values[i]:>12.2f}  ({series.measurements[i]}){marker}"
+                    )
 
-    if not records:
-        print("No data found. Check entity_id and date range.")
+    if not len(series):
+        emit("No data found. Check entity_id and date range.")
         return 0
 
     # Show value range
-    values = [r["value"] for r in records if r["value"] is not None]
-    if values:
-        print(f"Value range: {min(values):.2f} – {max(values):.2f} kWh")
+    if len(valid_idx):
+        valid_vals = series.values[valid_idx]
+        emit(f"Value range: {valid_vals.min():.2f} – {valid_vals.max():.2f} kWh")
 
-    outliers = find_outliers(records, threshold)
+    outliers = find_outliers(series, threshold)
 
     if not outliers:
-        print("No outliers found.")
+        emit("No outliers found.")
         return 0
 
-    print(f"\nFound {len(outliers)} outlier(s):")
-    print(f"{'Timestamp':<30} {'Type':>6} {'Value':>12} {'Prev':>12} {'Next':>12} {'Jump':>12}")
-    print("-" * 86)
+    emit(f"\nFound {len(outliers)} outlier(s):")
+    emit(f"{'Timestamp':<30} {'Type':>6} {'Value':>12} {'Prev':>12} {'Next':>12} {'Jump':>12}")
+    emit("-" * 86)
     for o in outliers:
         prev_str = f"{o['prev_value']:.2f}" if o["prev_value"] is not None else "N/A"
         next_str = f"{o['next_value']:.2f}" if o["next_value"] is not None else "N/A"
-        print(
+        emit(
             f"{o['time'].isoformat():<30} "
             f"{o['type']:>6} "
             f"{o['value']:>12.2f} "
@@ -271,15 +379,27 @@ def analyze_and_fix(
         )
 
     if apply:
-        print(f"\nDeleting {len(outliers)} outlier point(s)...")
-        deleted = delete_points(client, entity_id, outliers)
-        print(f"Done. Deleted {deleted}/{len(outliers)} points.")
+        emit(f"\nDeleting {len(outliers)} outlier point(s)...")
+        deleted = delete_points(client, entity_id, outliers, emit)
+        emit(f"Done. Deleted {deleted}/{len(outliers)} points.")
     else:
-        print("\nDry run — no changes made. Use --apply to delete.")
+        emit("\nDry run — no changes made. Use --apply to delete.")
 
     return len(outliers)
 
 
+def _load_settings() -> None:
+    """Load .env from the project root and read the InfluxDB settings."""
+    global INFLUXDB_URL, INFLUXDB_TOKEN, INFLUXDB_ORG, BUCKET
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE)
+    INFLUXDB_URL = os.environ.get("INFLUXDB_URL", INFLUXDB_URL)
+    INFLUXDB_TOKEN = os.environ.get("INFLUXDB_TOKEN", INFLUXDB_TOKEN)
+    INFLUXDB_ORG = os.environ.get("INFLUXDB_ORG", INFLUXDB_ORG)
+    BUCKET = os.environ.get("INFLUXDB_BUCKET", BUCKET)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Fix Shelly 3EM outliers in InfluxDB")
     parser.add_argument(
@@ -308,6 +428,9 @@ def main() -> None:
     )
     args = parser.parse_args()
 
+    _load_settings()
+    from influxdb_client import InfluxDBClient
+
     range_start = args.start
     range_stop = args.stop
     threshold = args.threshold
@@ -322,22 +445,40 @@ def main() -> None:
     print(f"Threshold: {threshold} kWh")
     print(f"Mode:     {'APPLY (will delete!)' if args.apply else 'DRY RUN'}")
 
-    client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
+    entities = [ENTITY_ID] if args.total_only else [ENTITY_ID, *PHASE_ENTITIES]
+
+    # One client for every sensor query and delete. Each sensor worker runs
+    # its own DELETE_WORKERS delete threads, so size the pool for all of them
+    # at once; a smaller pool makes urllib3 discard connections.
+    client = InfluxDBClient(
+        url=INFLUXDB_URL,
+        token=INFLUXDB_TOKEN,
+        org=INFLUXDB_ORG,
+        timeout=30_000,
+        enable_gzip=True,  # annotated CSV compresses ~10x
+        connection_pool_maxsize=len(entities) * DELETE_WORKERS,
+    )
 
     try:
         total_outliers = 0
 
-        # Check total energy sensor
-        total_outliers += analyze_and_fix(
-            client, ENTITY_ID, args.apply, range_start, range_stop, threshold, args.dump,
-        )
-
-        # Check per-phase sensors
-        if not args.total_only:
-            for phase_entity in PHASE_ENTITIES:
-                total_outliers += analyze_and_fix(
-                    client, phase_entity, args.apply, range_start, range_stop, threshold, args.dump,
+        # Check total energy sensor + per-phase sensors. The queries are
+        # independent round-trips, so run them concurrently on the shared
+        # client; each sensor's output is buffered and printed in order.
+        with ThreadPoolExecutor(max_workers=len(entities)) as pool:
+            runs = []
+            for entity in entities:
+                lines: list[str] = []
+                future = pool.submit(
+                    analyze_and_fix, client, entity, args.apply,
+                    range_start, range_stop, threshold, args.dump, lines.append,
                 )
+                runs.append((future, lines))
+            for future, lines in runs:
+                try:
+                    total_outliers += future.result()
+                finally:
+                    print("\n".join(lines))
 
         print(f"\n{'='*60}")
         print(f"Total outliers found: {total_outliers}")
@@ -6,7 +6,9 @@ and writes a comprehensive reference document. Useful for AI assistants and
 developers who need a complete picture of the smart home setup.
 
 Dependencies: Python 3.10+ (stdlib only). Optionally `pip install websockets`
-for area/device/entity registry data.
+for area/device/entity registry data, `pip install ijson` to stream-parse
+the (large) /states response, `pip install uvloop` for a faster event loop,
+and `pip install orjson` for faster JSON decoding.
 
 Usage:
     python scripts/ha-export.py                      # Uses .env for HA_URL/HA_TOKEN
@@ -17,22 +19,44 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import http.client
 import json
 import os
 import ssl
 import sys
+import tempfile
 import urllib.request
 import urllib.error
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, TextIO
 
 try:
     import websockets
 except ImportError:
     websockets = None  # type: ignore[assignment]
 
+try:
+    import ijson
+    _STREAM_ERRORS: tuple[type[Exception], ...] = (ijson.JSONError,)
+except ImportError:
+    ijson = None  # type: ignore[assignment]
+    _STREAM_ERRORS = ()
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # type: ignore[assignment]
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_OUTPUT = REPO_ROOT / "HomeAssistant_config" / "ha_export.md"
 
@@ -47,6 +71,11 @@ DOMAIN_ORDER = [
     "device_tracker", "person", "zone", "sun", "weather",
     "update", "tts", "notify",
 ]
+DOMAIN_RANK: dict[str, int] = {d: i for i, d in enumerate(DOMAIN_ORDER)}
+
+# Sort decorated entity tuples by (area or "zzz", entity_id) only, never
+# falling through to compare the state dicts
+_ENTITY_SORT_KEY = itemgetter(0, 1)
 
 # Key attributes worth showing for specific domains
 DOMAIN_EXTRA_ATTRS: dict[str, list[str]] = {
@@ -95,8 +124,16 @@ def _get_config() -> tuple[str, str]:
 # REST API helpers (stdlib only — no httpx needed)
 # ---------------------------------------------------------------------------
 
-def _ha_get(url: str, token: str, path: str) -> Any:
-    """GET a Home Assistant REST API endpoint. Returns parsed JSON."""
+# Allow self-signed certs (common in homelab setups). Built once and shared by
+# all REST calls and the WebSocket, instead of a fresh context per request.
+# Pointing HA_URL at a plain http:// reverse-proxy endpoint skips TLS entirely.
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+
+
+def _ha_open(url: str, token: str, path: str) -> Any:
+    """Open a GET request to a Home Assistant REST API endpoint."""
     req = urllib.request.Request(
         f"{url}/api{path}",
         headers={
@@ -104,13 +141,27 @@ def _ha_get(url: str, token: str, path: str) -> Any:
             "Content-Type": "application/json",
         },
     )
-    # Allow self-signed certs (common in homelab setups)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
+    return urllib.request.urlopen(req, timeout=30, context=_SSL_CTX)
+
+
+def _ha_get(url: str, token: str, path: str) -> Any:
+    """GET a Home Assistant REST API endpoint. Returns parsed JSON."""
+    with _ha_open(url, token, path) as resp:
+        return _loads(resp.read())
+
+
+def _ha_iter_states(resp: Any) -> Iterator[dict[str, Any]]:
+    """Yield the entities of an open /states response one at a time.
 
-    with urllib.request.urlopen(req, timeout=30, context=ctx) as resp:
-        return json.loads(resp.read().decode())
+    /states is by far the largest response. With ijson the entities are
+    parsed straight off the socket and handed to the caller as they arrive,
+    so neither the raw body nor a full list of states is ever built.
+    Without ijson the body is read and decoded in one go.
+    """
+    if ijson is None:
+        yield from _loads(resp.read())
+        return
+    yield from ijson.items(resp, "item", use_float=True)
 
 
 # ---------------------------------------------------------------------------
@@ -136,27 +187,30 @@ async def _fetch_ws_registries(
     }
 
     try:
-        # Allow self-signed certs for wss://
-        ssl_ctx = ssl.create_default_context()
-        ssl_ctx.check_hostname = False
-        ssl_ctx.verify_mode = ssl.CERT_NONE
-
-        async with websockets.connect(ws_url, close_timeout=10, ssl=ssl_ctx if ws_url.startswith("wss") else None) as ws:
+        async with websockets.connect(ws_url, close_timeout=10, ssl=_SSL_CTX if ws_url.startswith("wss") else None) as ws:
             # Auth handshake
-            msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            msg = _loads(await asyncio.wait_for(ws.recv(), timeout=10))
             if msg.get("type") != "auth_required":
                 raise RuntimeError(f"Unexpected initial message: {msg.get('type')}")
 
             await ws.send(json.dumps({"type": "auth", "access_token": token}))
-            msg = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            msg = _loads(await asyncio.wait_for(ws.recv(), timeout=10))
             if msg.get("type") != "auth_ok":
                 err = msg.get("message", "unknown error")
                 raise RuntimeError(f"WebSocket auth failed: {err}")
 
-            # Fetch each registry over the same connection
-            for i, (name, cmd) in enumerate(commands.items(), start=1):
+            # Pipeline all registry requests over the same connection, then
+            # collect the responses by id (HA may answer in any order). Each
+            # result is stored as it arrives so a later timeout keeps it.
+            names_by_id = dict(enumerate(commands, start=1))
+            for i, cmd in enumerate(commands.values(), start=1):
                 await ws.send(json.dumps({"id": i, "type": cmd}))
-                resp = json.loads(await asyncio.wait_for(ws.recv(), timeout=30))
+
+            while len(registries) < len(names_by_id):
+                resp = _loads(await asyncio.wait_for(ws.recv(), timeout=30))
+                name = names_by_id.get(resp.get("id"))
+                if name is None or name in registries:
+                    continue
                 if resp.get("success"):
                     registries[name] = resp["result"]
                     print(f"    {name}: {len(resp['result'])} entries")
@@ -176,21 +230,48 @@ async def _fetch_ws_registries(
 # Markdown helpers
 # ---------------------------------------------------------------------------
 
+_ESC_TABLE = str.maketrans({"|": "\\|", "\n": " "})
+
+
 def _esc(text: str) -> str:
     """Escape pipe characters for Markdown table cells."""
     if not text:
         return ""
-    return str(text).replace("|", "\\|").replace("\n", " ")
+    return str(text).translate(_ESC_TABLE)
 
 
 def _trunc(text: str, max_len: int = 60) -> str:
     """Truncate text, replacing newlines with spaces."""
     if not text:
         return ""
+    # Fast path: most names/states are short, single-line strings
+    if isinstance(text, str) and len(text) <= max_len and "\n" not in text:
+        return text
     text = str(text).replace("\n", " ")
     return text[: max_len - 1] + "…" if len(text) > max_len else text
 
 
+def _row(e: dict[str, Any]) -> tuple[str, dict[str, Any], Any, Any, Any, Any]:
+    """Pull the raw entity-table fields out of a state object.
+
+    Returns (entity_id, attributes, friendly_name, state, unit, device_class).
+    """
+    attrs = e.get("attributes") or {}
+    get = attrs.get
+    return (
+        e["entity_id"],
+        attrs,
+        get("friendly_name", ""),
+        e.get("state", ""),
+        get("unit_of_measurement", ""),
+        get("device_class", ""),
+    )
+
+
+def _service_domain_key(svc_domain: dict[str, Any]) -> str:
+    return svc_domain.get("domain", "")
+
+
 def _fmt_extra_attrs(attrs: dict[str, Any], domain: str) -> str:
     """Format the domain-specific extra attributes for the table."""
     keys = DOMAIN_EXTRA_ATTRS.get(domain, [])
@@ -342,8 +423,28 @@ class RegistryLookup:
         for e in registries.get("entities", []):
             self.entity_meta[e["entity_id"]] = e
 
-    def area_for(self, entity_id: str) -> str:
-        meta = self.entity_meta.get(entity_id, {})
+        self.disabled_ids: frozenset[str] = frozenset(
+            eid for eid, meta in self.entity_meta.items()
+            if meta.get("disabled_by") is not None
+        )
+        self.hidden_ids: frozenset[str] = frozenset(
+            eid for eid, meta in self.entity_meta.items()
+            if meta.get("hidden_by") is not None
+        )
+
+        # Resolve areas and device names once; they are looked up several
+        # times per entity while rendering.
+        self._area_cache: dict[str, str] = {}
+        self._device_name_cache: dict[str, str] = {}
+        for eid, meta in self.entity_meta.items():
+            area = self._resolve_area(meta)
+            if area:
+                self._area_cache[eid] = area
+            device_name = self._resolve_device_name(meta)
+            if device_name:
+                self._device_name_cache[eid] = device_name
+
+    def _resolve_area(self, meta: dict[str, Any]) -> str:
         # Entity-level area takes precedence
         area_id = meta.get("area_id")
         if area_id and area_id in self.area_map:
@@ -356,22 +457,27 @@ class RegistryLookup:
                 return self.area_map[area_id]
         return ""
 
-    def device_name_for(self, entity_id: str) -> str:
-        meta = self.entity_meta.get(entity_id, {})
+    def _resolve_device_name(self, meta: dict[str, Any]) -> str:
         device_id = meta.get("device_id")
         if device_id and device_id in self.device_map:
             dev = self.device_map[device_id]
             return dev.get("name_by_user") or dev.get("name") or ""
         return ""
 
+    def area_for(self, entity_id: str) -> str:
+        return self._area_cache.get(entity_id, "")
+
+    def device_name_for(self, entity_id: str) -> str:
+        return self._device_name_cache.get(entity_id, "")
+
     def platform_for(self, entity_id: str) -> str:
         return self.entity_meta.get(entity_id, {}).get("platform", "")
 
     def is_disabled(self, entity_id: str) -> bool:
-        return self.entity_meta.get(entity_id, {}).get("disabled_by") is not None
+        return entity_id in self.disabled_ids
 
     def is_hidden(self, entity_id: str) -> bool:
-        return self.entity_meta.get(entity_id, {}).get("hidden_by") is not None
+        return entity_id in self.hidden_ids
 
 
 # ---------------------------------------------------------------------------
@@ -380,150 +486,168 @@ class RegistryLookup:
 
 def generate_markdown(
     config: dict[str, Any],
-    states: list[dict[str, Any]],
+    states: Iterable[dict[str, Any]],
     services: list[dict[str, Any]],
     registries: dict[str, list[dict[str, Any]]],
-) -> str:
+    out: TextIO,
+) -> int:
+    """Write the Markdown export to *out*, line by line.
+
+    No list of lines or joined document string is built; each line goes
+    straight to *out*. *states* is consumed exactly once, so it may be a
+    generator. Returns the number of states read.
+    """
     reg = RegistryLookup(registries)
     now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
-    # ----- Group entities by domain (skip disabled/hidden) -----
-    by_domain: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    # ----- Single pass: entity counts per area, group by domain -----
+    # Area counts include disabled/hidden entities; the domain tables don't.
+    # Entities are stored decorated as (sort area, entity_id, area, state) so
+    # the per-domain sort and the rows never resolve the area again.
+    by_domain: dict[str, list[tuple[str, str, str, dict[str, Any]]]] = defaultdict(list)
+    area_counts: dict[str, int] = defaultdict(int)
+    skipped_ids = reg.disabled_ids | reg.hidden_ids
+    area_for = reg.area_for
+    state_count = 0
     for s in states:
+        state_count += 1
         eid = s.get("entity_id", "")
-        if reg.is_disabled(eid) or reg.is_hidden(eid):
+        area = area_for(eid)
+        if area:
+            area_counts[area] += 1
+        if eid in skipped_ids:
             continue
-        domain = eid.split(".")[0] if "." in eid else "unknown"
-        by_domain[domain].append(s)
+        domain, sep, _ = eid.partition(".")
+        by_domain[domain if sep else "unknown"].append((area or "zzz", eid, area, s))
 
     all_domains = sorted(
         by_domain.keys(),
-        key=lambda d: (DOMAIN_ORDER.index(d) if d in DOMAIN_ORDER else 999, d),
+        key=lambda d: (DOMAIN_RANK.get(d, 999), d),
     )
 
-    # ----- Entity counts per area -----
-    area_counts: dict[str, int] = defaultdict(int)
-    for s in states:
-        area = reg.area_for(s["entity_id"])
-        if area:
-            area_counts[area] += 1
-
     total_entities = sum(len(v) for v in by_domain.values())
     total_svc = sum(len(s.get("services", {})) for s in services)
 
-    lines: list[str] = []
+    write = out.write
+
+    def emit(line: str) -> None:
+        write(line)
+        write("\n")
 
     # ===== Header =====
-    lines.append("# Home Assistant Data Export\n")
-    lines.append(f"> **Generated**: {now}  ")
-    lines.append(f"> **HA Version**: {config.get('version', '?')}  ")
-    lines.append(f"> **Instance**: {config.get('location_name', 'Home')}  ")
+    emit("# Home Assistant Data Export\n")
+    emit(f"> **Generated**: {now}  ")
+    emit(f"> **HA Version**: {config.get('version', '?')}  ")
+    emit(f"> **Instance**: {config.get('location_name', 'Home')}  ")
     lat = config.get("latitude", "?")
     lon = config.get("longitude", "?")
     tz = config.get("time_zone", "?")
-    lines.append(f"> **Location**: {lat}, {lon} ({tz})\n")
+    emit(f"> **Location**: {lat}, {lon} ({tz})\n")
 
     # ===== Summary =====
-    lines.append("## Summary\n")
+    emit("## Summary\n")
     areas_list = registries.get("areas", [])
     devices_list = registries.get("devices", [])
-    lines.append(f"- **{len(areas_list)}** areas")
-    lines.append(f"- **{len(devices_list)}** devices")
-    lines.append(f"- **{total_entities}** entities across **{len(all_domains)}** domains")
-    lines.append(f"- **{total_svc}** services across **{len(services)}** domains\n")
+    emit(f"- **{len(areas_list)}** areas")
+    emit(f"- **{len(devices_list)}** devices")
+    emit(f"- **{total_entities}** entities across **{len(all_domains)}** domains")
+    emit(f"- **{total_svc}** services across **{len(services)}** domains\n")
 
     # ===== Areas =====
     if areas_list:
-        lines.append("## Areas\n")
-        lines.append("| Area | Entities |")
-        lines.append("|------|----------|")
+        emit("## Areas\n")
+        emit("| Area | Entities |")
+        emit("|------|----------|")
         for a in sorted(areas_list, key=lambda x: x.get("name", "")):
             name = a.get("name", "")
-            lines.append(f"| {_esc(name)} | {area_counts.get(name, 0)} |")
-        lines.append("")
+            emit(f"| {_esc(name)} | {area_counts.get(name, 0)} |")
+        emit("")
 
     # ===== Entities by Domain =====
-    lines.append("## Entities by Domain\n")
+    emit("## Entities by Domain\n")
 
     # Domain index
     for domain in all_domains:
-        lines.append(f"- [{domain}](#{domain}) ({len(by_domain[domain])})")
-    lines.append("")
+        emit(f"- [{domain}](#{domain}) ({len(by_domain[domain])})")
+    emit("")
 
     for domain in all_domains:
         entities = by_domain[domain]
-        entities.sort(key=lambda e: (reg.area_for(e["entity_id"]) or "zzz", e["entity_id"]))
+        entities.sort(key=_ENTITY_SORT_KEY)
 
-        lines.append(f"### {domain}\n")
-        lines.append(f"{len(entities)} entities\n")
+        emit(f"### {domain}\n")
+        emit(f"{len(entities)} entities\n")
 
         has_extra = domain in DOMAIN_EXTRA_ATTRS
         if has_extra:
-            lines.append("| Entity ID | Name | State | Unit | Class | Area | Extra |")
-            lines.append("|-----------|------|-------|------|-------|------|-------|")
+            emit("| Entity ID | Name | State | Unit | Class | Area | Extra |")
+            emit("|-----------|------|-------|------|-------|------|-------|")
         else:
-            lines.append("| Entity ID | Name | State | Unit | Class | Area |")
-            lines.append("|-----------|------|-------|------|-------|------|")
-
-        for e in entities:
-            eid = e["entity_id"]
-            attrs = e.get("attributes", {})
-            name = _esc(attrs.get("friendly_name", ""))
-            state = _esc(_trunc(e.get("state", ""), 40))
-            unit = _esc(attrs.get("unit_of_measurement", ""))
-            dcls = attrs.get("device_class", "")
-            area = _esc(reg.area_for(eid))
+            emit("| Entity ID | Name | State | Unit | Class | Area |")
+            emit("|-----------|------|-------|------|-------|------|")
+
+        # Rows are collected per domain and handed to the file in one write
+        # (a single domain table is small; the whole export never is)
+        rows: list[str] = []
+        add_row = rows.append
+        for _, _, area, e in entities:
+            eid, attrs, name, state, unit, dcls = _row(e)
+            name = _esc(name)
+            state = _esc(_trunc(state, 40))
+            unit = _esc(unit)
+            dcls = str(dcls)
+            area = _esc(area)
 
             if has_extra:
                 extra = _esc(_trunc(_fmt_extra_attrs(attrs, domain), 80))
-                lines.append(
-                    f"| `{eid}` | {name} | {state} | {unit} | {dcls} | {area} | {extra} |"
-                )
+                row = ("`" + eid + "`", name, state, unit, dcls, area, extra)
             else:
-                lines.append(
-                    f"| `{eid}` | {name} | {state} | {unit} | {dcls} | {area} |"
-                )
-
-        lines.append("")
+                row = ("`" + eid + "`", name, state, unit, dcls, area)
+            add_row("| " + " | ".join(row) + " |")
+        rows.append("\n")
+        write("\n".join(rows))
 
     # ===== Services =====
-    lines.append("## Available Services\n")
+    emit("## Available Services\n")
 
-    for svc_domain in sorted(services, key=lambda s: s.get("domain", "")):
+    for svc_domain in sorted(services, key=_service_domain_key):
         domain = svc_domain.get("domain", "")
         svcs = svc_domain.get("services", {})
         if not svcs:
             continue
 
-        lines.append(f"### {domain}\n")
-        lines.append(f"{len(svcs)} services\n")
+        emit(f"### {domain}\n")
+        emit(f"{len(svcs)} services\n")
 
-        for svc_name, svc_info in sorted(svcs.items()):
+        # Sort names only: item tuples would compare as (name, dict) pairs
+        for svc_name in sorted(svcs):
+            svc_info = svcs[svc_name]
             svc_display_name = svc_info.get("name", svc_name)
             desc = svc_info.get("description", "")
 
-            lines.append(f"#### `{domain}.{svc_name}`")
+            emit(f"#### `{domain}.{svc_name}`")
             if svc_display_name and svc_display_name != svc_name:
-                lines.append(f"**{_esc(svc_display_name)}**\n")
+                emit(f"**{_esc(svc_display_name)}**\n")
             else:
-                lines.append("")
+                emit("")
 
             if desc:
-                lines.append(f"{_esc(desc)}\n")
+                emit(f"{_esc(desc)}\n")
 
             # Target info
             target = svc_info.get("target")
             target_str = _fmt_target(target)
             if target_str:
-                lines.append(f"**Target**: {target_str}\n")
+                emit(f"**Target**: {target_str}\n")
 
             # Fields table
             fields = svc_info.get("fields", {})
             if fields:
-                lines.append("| Field | Description | Required | Type |")
-                lines.append("|-------|-------------|----------|------|")
+                emit("| Field | Description | Required | Type |")
+                emit("|-------|-------------|----------|------|")
 
-                for fname, finfo in sorted(fields.items()):
+                for fname in sorted(fields):
+                    finfo = fields[fname]
                     if not isinstance(finfo, dict):
                         continue
                     fdesc = _esc(_trunc(finfo.get("description", ""), 60))
@@ -537,33 +661,34 @@ def generate_markdown(
                         sub_fields = finfo.get("fields", {})
                         if sub_fields:
                             group_desc = _esc(_trunc(finfo.get("description", fname), 60))
-                            lines.append(
+                            emit(
                                 f"| **{fname}** | *{group_desc}* | | *group* |"
                             )
-                            for sf_name, sf_info in sorted(sub_fields.items()):
+                            for sf_name in sorted(sub_fields):
+                                sf_info = sub_fields[sf_name]
                                 if not isinstance(sf_info, dict):
                                     continue
                                 sf_desc = _esc(_trunc(sf_info.get("description", ""), 55))
                                 sf_req = "yes" if sf_info.get("required") else ""
                                 sf_sel = _esc(_fmt_selector(sf_info.get("selector")))
-                                lines.append(
+                                emit(
                                     f"|  ↳ {sf_name} | {sf_desc} | {sf_req} | {sf_sel} |"
                                 )
                         continue
 
-                    lines.append(
+                    emit(
                         f"| {fname} | {fdesc} | {freq} | {fsel} |"
                     )
 
-                lines.append("")
+                emit("")
             else:
-                lines.append("*No fields*\n")
+                emit("*No fields*\n")
 
     # ===== Devices =====
     if devices_list:
-        lines.append("## Devices\n")
-        lines.append("| Device | Manufacturer | Model | Area |")
-        lines.append("|--------|--------------|-------|------|")
+        emit("## Devices\n")
+        emit("| Device | Manufacturer | Model | Area |")
+        emit("|--------|--------------|-------|------|")
 
         for d in sorted(devices_list, key=lambda x: (
             reg.area_map.get(x.get("area_id", ""), "zzz"),
@@ -575,17 +700,35 @@ def generate_markdown(
             manufacturer = _esc(d.get("manufacturer") or "")
             model = _esc(_trunc(d.get("model") or "", 40))
             area = _esc(reg.area_map.get(d.get("area_id", ""), ""))
-            lines.append(f"| {name} | {manufacturer} | {model} | {area} |")
+            emit(f"| {name} | {manufacturer} | {model} | {area} |")
 
-        lines.append("")
+        emit("")
 
     # ===== Footer =====
-    lines.append("---\n")
-    lines.append(
-        "*Regenerate this file with `python scripts/ha-export.py`*\n"
-    )
+    emit("---\n")
+    write("*Regenerate this file with `python scripts/ha-export.py`*\n")
+    return state_count
+
+
+@contextmanager
+def _atomic_output(path: Path) -> Iterator[TextIO]:
+    """Open a temp file next to *path* and move it onto *path* only on success.
 
-    return "\n".join(lines)
+    A failure while generating leaves the previous export untouched and
+    removes the partial temp file.
+    """
+    tmp = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", buffering=1 << 20, dir=path.parent,
+        prefix=f".{path.name}.", suffix=".tmp", delete=False,
+    )
+    try:
+        with tmp:
+            yield tmp
+        os.chmod(tmp.name, 0o644)  # NamedTemporaryFile creates 0600
+        os.replace(tmp.name, path)
+    except BaseException:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
 
 
 # ---------------------------------------------------------------------------
@@ -616,39 +759,52 @@ async def main() -> None:
     try:
         print(f"Connecting to Home Assistant at {ha_url} …")
 
-        # -- REST: config --
-        print("  Fetching config …")
-        try:
-            config = _ha_get(ha_url, ha_token, "/config")
+        # REST config/states/services and the WebSocket registries are
+        # independent — fetch them concurrently (blocking urllib calls run
+        # in worker threads) so the export waits for the slowest, not the sum.
+        print("  Fetching config, states, services and registries …")
+        # /states is only opened here; its body is parsed while the Markdown
+        # is generated, once the registries needed for grouping are in.
+        config_result, states_resp, services, registries = await asyncio.gather(
+            asyncio.to_thread(_ha_get, ha_url, ha_token, "/config"),
+            asyncio.to_thread(_ha_open, ha_url, ha_token, "/states"),
+            asyncio.to_thread(_ha_get, ha_url, ha_token, "/services"),
+            _fetch_ws_registries(ha_url, ha_token),
+            return_exceptions=True,
+        )
+
+        # -- REST: config (optional) --
+        if isinstance(config_result, Exception):
+            print(f"    config: failed ({config_result})")
+            config: dict[str, Any] = {}
+        else:
+            config = config_result
             print(f"    HA version {config.get('version', '?')}")
-        except Exception as exc:
-            print(f"    Failed: {exc}")
-            config = {}
-
-        # -- REST: states --
-        print("  Fetching states …")
-        states: list[dict[str, Any]] = _ha_get(ha_url, ha_token, "/states")
-        print(f"    {len(states)} entities")
-
-        # -- REST: services --
-        print("  Fetching services …")
-        services: list[dict[str, Any]] = _ha_get(ha_url, ha_token, "/services")
+
+        # -- REST: states + services (required) --
+        for result in (states_resp, services, registries):
+            if isinstance(result, BaseException):
+                if not isinstance(states_resp, BaseException):
+                    states_resp.close()
+                raise result
         total_svc = sum(len(s.get("services", {})) for s in services)
         print(f"    {total_svc} services across {len(services)} domains")
 
-        # -- WebSocket: registries (optional) --
-        print("  Fetching registries via WebSocket …")
-        registries = await _fetch_ws_registries(ha_url, ha_token)
-
         # -- Generate Markdown --
         print("Generating Markdown …")
-        md = generate_markdown(config, states, services, registries)
-
         args.output.parent.mkdir(parents=True, exist_ok=True)
-        args.output.write_text(md, encoding="utf-8")
+        with states_resp, _atomic_output(args.output) as out:
+            n_states = generate_markdown(
+                config, _ha_iter_states(states_resp), services, registries, out,
+            )
+        print(f"    {n_states} entities")
 
         size_kb = args.output.stat().st_size / 1024
-        print(f"\nDone — {args.output.relative_to(REPO_ROOT)}  ({size_kb:.1f} KB)")
+        shown = (
+            args.output.relative_to(REPO_ROOT)
+            if args.output.is_relative_to(REPO_ROOT) else args.output
+        )
+        print(f"\nDone — {shown}  ({size_kb:.1f} KB)")
 
     except urllib.error.HTTPError as exc:
         print(f"\nError: HTTP {exc.code} from {ha_url}")
@@ -659,7 +815,21 @@ async def main() -> None:
         print(f"\nError: Cannot reach {ha_url} — {exc.reason}")
         print("  Check that HA_URL is correct and Home Assistant is running.")
         sys.exit(1)
+    except (http.client.HTTPException, OSError, ValueError, *_STREAM_ERRORS) as exc:
+        # /states is parsed while the export is written, so a dropped
+        # connection or malformed body surfaces here; the old export is kept.
+        print(f"\nError: export failed — {exc!r}")
+        print(f"  {args.output} was left unchanged.")
+        sys.exit(1)
+
+
+def _run() -> None:
+    """Run main() on uvloop when it is installed, else the default event loop."""
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    _run()
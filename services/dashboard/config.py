@@ -43,9 +43,14 @@ class DashboardSettings(BaseSettings):
     dashboard_user_name: str = "Dashboard"
 
     # --- Update intervals (seconds) ---
-    ha_poll_interval: int = 10
+    ha_poll_interval: int = 10  # fallback polling (power/SoC) while the HA WebSocket is down
+    ha_slow_poll_interval: int = 60  # fallback polling of all entities while it is down
+    ha_resync_interval: int = 300  # full resync alongside the WebSocket subscription
     ui_refresh_interval: int = 3
 
+    # --- Profiling ---
+    profiling_enabled: bool = False  # time NATS/HA handlers and sample event-loop lag
+
     # --- Digital Twin API ---
     digital_twin_url: str = "http://digital-twin:8238"
 
@@ -2,8 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
 from nicegui import ui
 
+if TYPE_CHECKING:
+    from state import DashboardState
+
 # Color palette used across all pages
 COLORS = {
     "bg": "#0a0a14",
@@ -24,6 +32,19 @@ COLORS = {
     "warning": "#f59e0b",
 }
 
+# One CSS class per palette color for metric cards, so rendering a card
+# toggles prebuilt classes instead of formatting inline styles.  Colors that
+# share a hex value share the first class defined for it.
+_METRIC_COLOR_CLASSES: dict[str, str] = {}
+for _name, _hex in COLORS.items():
+    _METRIC_COLOR_CLASSES.setdefault(_hex, f"mc-{_name.replace('_', '-')}")
+
+_METRIC_CSS = "".join(
+    f"    .{cls} {{ border-left: 4px solid {hex_} !important; }}\n"
+    f"    .{cls} .mc-accent {{ color: {hex_}; }}\n"
+    for hex_, cls in _METRIC_COLOR_CLASSES.items()
+)
+
 _GLOBAL_CSS = """
 <style>
     body { background: #0a0a14 !important; }
@@ -34,14 +55,19 @@ _GLOBAL_CSS = """
     .metric-card:hover { transform: translateY(-2px); box-shadow: 0 8px 25px rgba(0,0,0,0.3); }
     .nav-btn { opacity: 0.7; transition: opacity 0.2s; }
     .nav-btn:hover { opacity: 1; }
+    .nav-active { color: #6366f1; }
+    .nav-inactive { color: #94a3b8; }
     .chat-container { display: flex; flex-direction: column; }
     .chat-scroll { flex: 1; overflow-y: auto; }
     ::-webkit-scrollbar { width: 6px; }
     ::-webkit-scrollbar-track { background: #0a0a14; }
     ::-webkit-scrollbar-thumb { background: #2d2d4a; border-radius: 3px; }
     ::-webkit-scrollbar-thumb:hover { background: #3d3d5a; }
-</style>
-"""
+""" + _METRIC_CSS + "</style>\n"
+
+# Registered once for all pages: NiceGUI bakes shared head HTML into the page
+# template, so individual clients don't each carry (and re-inject) a copy.
+ui.add_head_html(_GLOBAL_CSS, shared=True)
 
 NAV_ITEMS = [
     ("/", "dashboard", "Dashboard"),
@@ -71,8 +97,6 @@ def create_page_layout(active_path: str = "/") -> None:
         warning="#f97316",
     )
 
-    ui.add_head_html(_GLOBAL_CSS)
-
     with ui.header().classes("px-4 py-2"):
         with ui.row().classes("w-full items-center no-wrap"):
             ui.icon("solar_power").classes("text-2xl").style("color: #6366f1")
@@ -81,13 +105,73 @@ def create_page_layout(active_path: str = "/") -> None:
             )
             ui.space()
             for href, icon, label in NAV_ITEMS:
-                is_active = href == active_path
-                color = "#6366f1" if is_active else "#94a3b8"
                 ui.button(
                     label,
                     icon=icon,
                     on_click=lambda h=href: ui.navigate.to(h),
-                ).props("flat no-caps").classes("nav-btn").style(f"color: {color}")
+                ).props("flat no-caps").classes(
+                    "nav-btn nav-active" if href == active_path else "nav-btn nav-inactive"
+                )
+
+
+# Updates arriving within this window are rendered in a single refresh
+REFRESH_DEBOUNCE = 0.1
+
+
+def refresh_on_change(
+    state: DashboardState,
+    sections: Sequence[tuple[Callable[[], None], tuple[str, ...]]],
+) -> None:
+    """Refresh page sections when, and only when, their data changes.
+
+    Each entry pairs a refresh callable with the state sections it reads
+    (see ``DashboardState.version``). Updates mark the page dirty and one
+    refresh runs REFRESH_DEBOUNCE seconds later, so a burst of NATS or HA
+    messages costs a single render. Only active while the client is
+    connected.
+    """
+    last_seen = [state.version(*keys) for _, keys in sections]
+    handle: asyncio.TimerHandle | None = None
+
+    def flush() -> None:
+        nonlocal handle
+        handle = None
+        for i, (refresh, keys) in enumerate(sections):
+            current = state.version(*keys)
+            if current != last_seen[i]:
+                last_seen[i] = current
+                refresh()
+
+    def on_change() -> None:
+        nonlocal handle
+        if handle is None:
+            handle = asyncio.get_running_loop().call_later(REFRESH_DEBOUNCE, flush)
+
+    def on_disconnect() -> None:
+        nonlocal handle
+        state.remove_change_listener(on_change)
+        if handle is not None:
+            handle.cancel()
+            handle = None
+
+    state.add_change_listener(on_change)
+    client = ui.context.client
+    client.on_connect(lambda: state.add_change_listener(on_change))
+    client.on_disconnect(on_disconnect)
+
+
+def connected_timer(interval: float, callback: Callable[..., Any]) -> ui.timer:
+    """A page ``ui.timer`` that pauses while its browser client is disconnected.
+
+    NiceGUI keeps a page's elements alive for a while after the socket drops
+    (to allow reconnects); without this the timer keeps refreshing, and
+    fetching, for nobody.
+    """
+    timer = ui.timer(interval, callback)
+    client = ui.context.client
+    client.on_connect(timer.activate)
+    client.on_disconnect(timer.deactivate)
+    return timer
 
 
 def section_title(text: str) -> None:
@@ -95,6 +179,65 @@ def section_title(text: str) -> None:
     ui.label(text).classes("text-xl font-bold").style("color: #e2e8f0")
 
 
+@dataclass
+class MetricCard:
+    """Handles to a rendered metric card, for in-place updates.
+
+    ``update`` only touches what changed; NiceGUI skips sending properties
+    whose value is unchanged, so an idle update is nearly free.
+    """
+
+    card: ui.card
+    icon: ui.icon
+    title: ui.label
+    value: ui.label
+    unit: ui.label
+    subtitle: ui.label
+    color: str
+
+    def update(
+        self,
+        value: str,
+        *,
+        icon: str | None = None,
+        title: str | None = None,
+        unit: str | None = None,
+        subtitle: str | None = None,
+        color: str | None = None,
+    ) -> None:
+        self.value.set_text(value)
+        if icon is not None:
+            self.icon.set_name(icon)
+        if title is not None:
+            self.title.set_text(title)
+        if unit is not None:
+            self.unit.set_text(unit)
+        if subtitle is not None:
+            self.subtitle.set_text(subtitle)
+            self.subtitle.set_visibility(bool(subtitle))
+        if color is not None and color != self.color:
+            _set_metric_color(self, color)
+
+
+def _set_metric_color(mc: MetricCard, color: str) -> None:
+    old_cls = _METRIC_COLOR_CLASSES.get(mc.color)
+    if old_cls:
+        mc.card.classes(remove=old_cls)
+    elif mc.color:
+        mc.card.style(remove=f"border-left: 4px solid {mc.color} !important")
+        mc.icon.style(remove=f"color: {mc.color}")
+        mc.value.style(remove=f"color: {mc.color}")
+    color_cls = _METRIC_COLOR_CLASSES.get(color)
+    if color_cls:
+        mc.card.classes(color_cls)
+    else:
+        # Off-palette color: fall back to inline styles
+        mc.card.style(f"border-left: 4px solid {color} !important")
+        mc.icon.style(f"color: {color}")
+        mc.value.style(f"color: {color}")
+    mc.color = color
+
+
 def metric_card(
     icon: str,
     title: str,
@@ -102,17 +245,19 @@ def metric_card(
     unit: str,
     color: str,
     subtitle: str = "",
-) -> None:
+) -> MetricCard:
     """Render a metric card with colored left border."""
-    with ui.card().classes("p-4 flex-1 min-w-[170px] metric-card").style(
-        f"border-left: 4px solid {color} !important"
-    ):
+    card = ui.card().classes("p-4 flex-1 min-w-[170px] metric-card")
+    with card:
         with ui.row().classes("items-center gap-2"):
-            ui.icon(icon).style(f"color: {color}")
-            ui.label(title).classes("text-xs uppercase tracking-wide").style(
+            icon_el = ui.icon(icon).classes("mc-accent")
+            title_el = ui.label(title).classes("text-xs uppercase tracking-wide").style(
                 "color: #94a3b8"
             )
-        ui.label(value).classes("text-3xl font-bold mt-1").style(f"color: {color}")
-        ui.label(unit).classes("text-sm").style("color: #64748b")
-        if subtitle:
-            ui.label(subtitle).classes("text-xs mt-1").style("color: #94a3b8")
+        value_el = ui.label(value).classes("text-3xl font-bold mt-1 mc-accent")
+        unit_el = ui.label(unit).classes("text-sm").style("color: #64748b")
+        subtitle_el = ui.label(subtitle).classes("text-xs mt-1").style("color: #94a3b8")
+        subtitle_el.set_visibility(bool(subtitle))
+    mc = MetricCard(card, icon_el, title_el, value_el, unit_el, subtitle_el, "")
+    _set_metric_color(mc, color)
+    return mc
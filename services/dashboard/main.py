@@ -10,7 +10,11 @@ Provides:
 from __future__ import annotations
 
 import asyncio
+import functools
+import os
 import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
 from typing import Any
 
 import httpx
@@ -42,41 +46,129 @@ influx = InfluxClient(
 )
 nats = NatsPublisher(url=settings.nats_url)
 
+# ---------------------------------------------------------------------------
+# Profiling (handler timings + event-loop lag, exposed on /_profile)
+# ---------------------------------------------------------------------------
+
+# Upper bounds (ms) of the handler duration histogram buckets
+_TIMING_BUCKETS_MS: tuple[float, ...] = (1.0, 10.0, 100.0, 1000.0)
+
+_handler_stats: dict[str, dict[str, Any]] = {}
+_loop_lag: dict[str, float] = {"last_ms": 0.0, "max_ms": 0.0}
+
+
+def _record_timing(name: str, elapsed_ms: float) -> None:
+    stats = _handler_stats.get(name)
+    if stats is None:
+        stats = _handler_stats[name] = {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": Counter(),
+        }
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    if elapsed_ms > stats["max_ms"]:
+        stats["max_ms"] = elapsed_ms
+    for bound in _TIMING_BUCKETS_MS:
+        if elapsed_ms < bound:
+            stats["buckets"][f"<{bound:g}ms"] += 1
+            break
+    else:
+        stats["buckets"][f">={_TIMING_BUCKETS_MS[-1]:g}ms"] += 1
+
+
+def _timed(
+    func: Callable[..., Awaitable[None]],
+) -> Callable[..., Awaitable[None]]:
+    """Record the wall time of each call to an async handler.
+
+    A no-op unless profiling is enabled, so production handlers run unwrapped.
+    """
+    if not settings.profiling_enabled:
+        return func
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> None:
+        start = time.perf_counter()
+        try:
+            await func(*args, **kwargs)
+        finally:
+            _record_timing(name, (time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+async def _loop_lag_monitor(interval: float = 0.1, publish_every: float = 10.0) -> None:
+    """Sample event-loop lag and publish the worst value per window.
+
+    Sleeps ``interval`` seconds and measures how late the loop wakes up; a
+    blocking callback anywhere in the process shows up as lag here.
+    """
+    loop = asyncio.get_running_loop()
+    window_max = 0.0
+    window_start = loop.time()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag_ms = max(0.0, (loop.time() - expected) * 1000)
+        _loop_lag["last_ms"] = round(lag_ms, 2)
+        if lag_ms > _loop_lag["max_ms"]:
+            _loop_lag["max_ms"] = round(lag_ms, 2)
+        if lag_ms > window_max:
+            window_max = lag_ms
+        if loop.time() - window_start >= publish_every:
+            try:
+                await nats.publish(
+                    "dashboard.profile.loop_lag",
+                    {"loop_lag_ms": round(window_max, 2)},
+                )
+            except Exception:
+                pass
+            window_max = 0.0
+            window_start = loop.time()
+
 # ---------------------------------------------------------------------------
 # NATS message handlers (async)
 # ---------------------------------------------------------------------------
 
 
+@_timed
 async def _on_heartbeat_nats(subject: str, payload: dict[str, Any]) -> None:
     service = payload.get("service", "unknown")
     state.update_service(service, payload)
 
 
+@_timed
 async def _on_pv_update_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_pv_forecast(payload)
     logger.debug("pv_forecast_update_received")
 
 
+@_timed
 async def _on_ev_charging_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_ev_charging(payload)
 
 
+@_timed
 async def _on_ev_plan_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_ev_forecast(payload)
 
 
+@_timed
 async def _on_ev_vehicle_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_ev_vehicle(payload)
 
 
+@_timed
 async def _on_orchestrator_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_orchestrator(payload)
 
 
+@_timed
 async def _on_health_status_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_health(payload)
 
 
+@_timed
 async def _on_chat_response_nats(subject: str, payload: dict[str, Any]) -> None:
     request_id = payload.get("request_id", "")
     response = payload.get("response", "")
@@ -85,26 +177,30 @@ async def _on_chat_response_nats(subject: str, payload: dict[str, Any]) -> None:
         logger.info("chat_response_received", request_id=request_id)
 
 
+@_timed
 async def _on_dt_simulation_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_digital_twin_simulation(payload)
     logger.debug("digital_twin_simulation_updated")
 
 
+@_timed
 async def _on_dt_state_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_digital_twin_house_state(payload)
     logger.debug("digital_twin_state_updated")
 
 
+@_timed
 async def _on_dt_recommendation_nats(subject: str, payload: dict[str, Any]) -> None:
     state.update_digital_twin_recommendation(payload)
     logger.info("digital_twin_recommendation_received", scenario=payload.get("scenario_id"))
 
 
 # ---------------------------------------------------------------------------
-# HA polling
+# HA state (WebSocket subscription + fallback polling)
 # ---------------------------------------------------------------------------
 
-_POLL_ENTITIES: list[str] = [
+# Power/SoC readings that change every few seconds
+_FAST_ENTITIES: list[str] = [
     settings.pv_power_entity,
     settings.grid_power_entity,
     settings.battery_power_entity,
@@ -113,6 +209,10 @@ _POLL_ENTITIES: list[str] = [
     settings.inverter_power_entity,
     settings.ev_charge_power_entity,
     settings.ev_soc_entity,
+]
+
+# Slowly changing sensors and user-set controls
+_SLOW_ENTITIES: list[str] = [
     settings.ev_range_entity,
     settings.ev_plug_entity,
     settings.ev_charge_mode_entity,
@@ -125,55 +225,133 @@ _POLL_ENTITIES: list[str] = [
     settings.safe_mode_entity_id,
 ]
 
+_POLL_ENTITIES: list[str] = _FAST_ENTITIES + _SLOW_ENTITIES
+_POLL_ENTITY_SET: frozenset[str] = frozenset(_POLL_ENTITIES)
+
+
+@_timed
+async def _ha_poll_once() -> None:
+    """Fetch the current state of all dashboard entities.
 
-async def _ha_poll_loop() -> None:
-    """Periodically fetch HA entity states."""
+    One bulk GET /api/states, filtered locally, instead of one request per
+    entity.
+    """
+    try:
+        all_states = await ha.get_states()
+    except Exception:
+        logger.debug("ha_poll_failed")
+        return
+    seen: set[str] = set()
+    for data in all_states:
+        entity_id = data.get("entity_id", "")
+        if entity_id in _POLL_ENTITY_SET:
+            state.update_ha_entity(entity_id, data)
+            seen.add(entity_id)
+    if len(seen) < len(_POLL_ENTITY_SET):
+        logger.debug("ha_poll_missing", entity_ids=sorted(_POLL_ENTITY_SET - seen))
+
+
+@_timed
+async def _ha_poll_fast() -> None:
+    """Fetch only the fast-changing entities, concurrently, one GET each.
+
+    Much smaller than the bulk /api/states payload on a large HA instance.
+    """
+    results = await asyncio.gather(
+        *(ha.get_state(entity_id) for entity_id in _FAST_ENTITIES),
+        return_exceptions=True,
+    )
+    failed: list[str] = []
+    for entity_id, data in zip(_FAST_ENTITIES, results):
+        if isinstance(data, BaseException):
+            failed.append(entity_id)
+        else:
+            state.update_ha_entity(entity_id, data)
+    if failed:
+        # One aggregated line per cycle rather than one per entity
+        logger.debug("ha_poll_failed_batch", count=len(failed), entity_ids=failed[:5])
+
+
+async def _ha_watch_loop() -> None:
+    """Apply HA state changes pushed over the WebSocket API.
+
+    Each (re)connect seeds all entities once the subscription is active.
+    While the WebSocket is down, the fast tier is polled every
+    ha_poll_interval between reconnect attempts, and everything every
+    ha_slow_poll_interval.
+    """
+    last_full_poll = 0.0
     while True:
-        for entity_id in _POLL_ENTITIES:
-            try:
-                data = await ha.get_state(entity_id)
-                state.update_ha_entity(entity_id, data)
-            except Exception:
-                logger.debug("ha_poll_failed", entity_id=entity_id)
+        try:
+            async for entity_id, new_state in ha.watch_states(
+                _POLL_ENTITIES, on_subscribed=_ha_poll_once,
+            ):
+                if new_state is not None:
+                    state.update_ha_entity(entity_id, new_state)
+            logger.warning("ha_ws_closed")
+        except Exception as exc:
+            logger.warning("ha_ws_failed", error=str(exc))
+        now = time.monotonic()
+        if now - last_full_poll >= settings.ha_slow_poll_interval:
+            await _ha_poll_once()
+            last_full_poll = now
+        else:
+            await _ha_poll_fast()
         await asyncio.sleep(settings.ha_poll_interval)
 
 
+async def _ha_resync_loop() -> None:
+    """Low-frequency full resync as a safety net for missed WebSocket events."""
+    while True:
+        await asyncio.sleep(settings.ha_resync_interval)
+        await _ha_poll_once()
+
+
 # ---------------------------------------------------------------------------
 # Heartbeat
 # ---------------------------------------------------------------------------
 
 
+# Reused across ticks; only uptime and memory change. publish() serializes
+# before its first await, so mutating it between ticks is safe.
+_HEARTBEAT: dict[str, Any] = {
+    "status": "online",
+    "service": "dashboard",
+    "uptime_seconds": 0.0,
+    "memory_mb": 0.0,
+}
+
+
 async def _heartbeat_loop() -> None:
     """Publish dashboard heartbeat to NATS."""
     await asyncio.sleep(5)
     while True:
         try:
-            await nats.publish(
-                "heartbeat.dashboard",
-                {
-                    "status": "online",
-                    "service": "dashboard",
-                    "uptime_seconds": round(time.monotonic() - _start_time, 1),
-                    "memory_mb": _get_memory_mb(),
-                },
-            )
+            _HEARTBEAT["uptime_seconds"] = round(time.monotonic() - _start_time, 1)
+            _HEARTBEAT["memory_mb"] = _get_memory_mb()
+            await nats.publish("heartbeat.dashboard", _HEARTBEAT)
         except Exception:
             pass
         await asyncio.sleep(60)
 
 
+_statm_fd: int | None = None
+
+
 def _get_memory_mb() -> float:
-    """Read RSS from /proc (Linux)."""
-    import os
+    """Read current RSS from /proc/self/statm (Linux).
 
+    The file descriptor is opened once and re-read with pread; statm is a
+    single line of page counts, so there is no text scan.
+    """
+    global _statm_fd
     try:
-        with open(f"/proc/{os.getpid()}/status") as f:
-            for line in f:
-                if line.startswith("VmRSS:"):
-                    return round(int(line.split()[1]) / 1024, 1)
+        if _statm_fd is None:
+            _statm_fd = os.open("/proc/self/statm", os.O_RDONLY)
+        rss_pages = int(os.pread(_statm_fd, 128, 0).split()[1])
+        return round(rss_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
     except (OSError, ValueError, IndexError):
-        pass
-    return 0.0
+        return 0.0
 
 
 # ---------------------------------------------------------------------------
@@ -268,31 +446,33 @@ async def _register_ha_discovery() -> None:
     node = "dashboard"
     heartbeat_topic = "homelab/dashboard/heartbeat"
 
-    await nats.publish(
-        f"ha.discovery.binary_sensor.{node}.service_status.config",
-        {
-            "name": "Dashboard Status",
-            "device": device,
-            "state_topic": heartbeat_topic,
-            "value_template": "{{ 'ON' if value_json.status == 'online' else 'OFF' }}",
-            "device_class": "connectivity",
-            "expire_after": 180,
-            "unique_id": f"{node}_service_status",
-        },
-    )
-
-    await nats.publish(
-        f"ha.discovery.sensor.{node}.uptime.config",
-        {
-            "name": "Dashboard Uptime",
-            "device": device,
-            "state_topic": heartbeat_topic,
-            "value_template": "{{ value_json.uptime_seconds }}",
-            "unit_of_measurement": "s",
-            "icon": "mdi:timer-outline",
-            "entity_category": "diagnostic",
-            "unique_id": f"{node}_uptime",
-        },
+    # Independent configs: publish concurrently so they share one flush
+    await asyncio.gather(
+        nats.publish(
+            f"ha.discovery.binary_sensor.{node}.service_status.config",
+            {
+                "name": "Dashboard Status",
+                "device": device,
+                "state_topic": heartbeat_topic,
+                "value_template": "{{ 'ON' if value_json.status == 'online' else 'OFF' }}",
+                "device_class": "connectivity",
+                "expire_after": 180,
+                "unique_id": f"{node}_service_status",
+            },
+        ),
+        nats.publish(
+            f"ha.discovery.sensor.{node}.uptime.config",
+            {
+                "name": "Dashboard Uptime",
+                "device": device,
+                "state_topic": heartbeat_topic,
+                "value_template": "{{ value_json.uptime_seconds }}",
+                "unit_of_measurement": "s",
+                "icon": "mdi:timer-outline",
+                "entity_category": "diagnostic",
+                "unique_id": f"{node}_uptime",
+            },
+        ),
     )
 
     logger.info("ha_discovery_published", entity_count=2)
@@ -312,23 +492,26 @@ async def on_startup() -> None:
 
     # Connect NATS and set up subscriptions
     await nats.connect()
-    await nats.subscribe_json("heartbeat.>", _on_heartbeat_nats)
-    await nats.subscribe_json("energy.pv.forecast.updated", _on_pv_update_nats)
-    await nats.subscribe_json("energy.ev.charging.status", _on_ev_charging_nats)
-    await nats.subscribe_json("energy.ev.forecast.plan", _on_ev_plan_nats)
-    await nats.subscribe_json("energy.ev.forecast.vehicle", _on_ev_vehicle_nats)
-    await nats.subscribe_json("services.orchestrator.activity", _on_orchestrator_nats)
-    await nats.subscribe_json("services.health-monitor.status", _on_health_status_nats)
-    await nats.subscribe_json(
-        "services.dashboard.chat_response", _on_chat_response_nats
-    )
-    await nats.subscribe_json("digital.twin.simulation.done", _on_dt_simulation_nats)
-    await nats.subscribe_json("digital.twin.state.updated", _on_dt_state_nats)
-    await nats.subscribe_json("digital.twin.recommendation", _on_dt_recommendation_nats)
+    await nats.subscribe_json_many([
+        ("heartbeat.>", _on_heartbeat_nats),
+        ("energy.pv.forecast.updated", _on_pv_update_nats),
+        ("energy.ev.charging.status", _on_ev_charging_nats),
+        ("energy.ev.forecast.plan", _on_ev_plan_nats),
+        ("energy.ev.forecast.vehicle", _on_ev_vehicle_nats),
+        ("services.orchestrator.activity", _on_orchestrator_nats),
+        ("services.health-monitor.status", _on_health_status_nats),
+        ("services.dashboard.chat_response", _on_chat_response_nats),
+        ("digital.twin.simulation.done", _on_dt_simulation_nats),
+        ("digital.twin.state.updated", _on_dt_state_nats),
+        ("digital.twin.recommendation", _on_dt_recommendation_nats),
+    ])
 
     await _register_ha_discovery()
-    asyncio.create_task(_ha_poll_loop())
+    asyncio.create_task(_ha_watch_loop())
+    asyncio.create_task(_ha_resync_loop())
     asyncio.create_task(_heartbeat_loop())
+    if settings.profiling_enabled:
+        asyncio.create_task(_loop_lag_monitor())
     logger.info("dashboard_ready", port=settings.dashboard_port)
 
 
@@ -349,7 +532,7 @@ async def on_shutdown() -> None:
 
 
 # ---------------------------------------------------------------------------
-# Health endpoint (for Docker healthcheck)
+# Health + profiling endpoints
 # ---------------------------------------------------------------------------
 
 
@@ -358,6 +541,22 @@ def health_endpoint() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/_profile")
+def profile_endpoint() -> dict[str, Any]:
+    if not settings.profiling_enabled:
+        return {"enabled": False}
+    handlers = {
+        name: {
+            "count": stats["count"],
+            "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+            "max_ms": round(stats["max_ms"], 3),
+            "buckets": dict(stats["buckets"]),
+        }
+        for name, stats in _handler_stats.items()
+    }
+    return {"enabled": True, "handlers": handlers, "loop_lag": dict(_loop_lag)}
+
+
 # ---------------------------------------------------------------------------
 # Register page modules
 # ---------------------------------------------------------------------------
@@ -392,6 +591,8 @@ page_chat.setup(state, settings, nats)
 # Run
 # ---------------------------------------------------------------------------
 
+# uvicorn's default loop="auto" runs the server (and with it NATS handlers,
+# HA updates and UI pushes) on uvloop when it is installed — see requirements.
 ui.run(
     port=settings.dashboard_port,
     title=settings.dashboard_title,
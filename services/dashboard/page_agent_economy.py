@@ -16,7 +16,7 @@ from typing import TYPE_CHECKING, Any
 import httpx
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, section_title
+from layout import COLORS, connected_timer, create_page_layout, section_title
 
 if TYPE_CHECKING:
     from config import DashboardSettings
@@ -394,4 +394,4 @@ def setup(state: "DashboardState", settings: "DashboardSettings") -> None:
             render_spawn()
 
             # ── Auto-refresh every 30 seconds ──────────────────────────────
-            ui.timer(30.0, _on_refresh)
+            connected_timer(30.0, _on_refresh)
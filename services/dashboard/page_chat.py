@@ -1,13 +1,14 @@
-"""Chat page — talk to the orchestrator via MQTT."""
+"""Chat page — talk to the orchestrator via NATS."""
 
 from __future__ import annotations
 
-import time
+from functools import partial
 from typing import TYPE_CHECKING
 
 from nicegui import ui
 
 from layout import COLORS, create_page_layout
+from state import CHAT_HISTORY_LIMIT
 
 if TYPE_CHECKING:
     from shared.nats_client import NatsPublisher
@@ -16,6 +17,14 @@ if TYPE_CHECKING:
     from state import DashboardState
 
 
+_QUICK_PROMPTS = (
+    ("Energy status", "bolt"),
+    ("PV forecast", "wb_sunny"),
+    ("EV charging status", "electric_car"),
+    ("Weather forecast", "cloud"),
+)
+
+
 def setup(
     state: DashboardState,
     settings: DashboardSettings,
@@ -47,31 +56,54 @@ def setup(
                 )
             )
 
-            @ui.refreshable
-            def chat_messages() -> None:
-                with chat_scroll:
-                    with ui.column().classes("w-full p-4 gap-3"):
-                        if not state.chat_messages:
-                            with ui.column().classes(
-                                "w-full items-center justify-center py-16"
-                            ):
-                                ui.icon("smart_toy").style(
-                                    "color: #2d2d4a; font-size: 4rem"
-                                )
-                                ui.label("Start a conversation").classes(
-                                    "text-lg mt-2"
-                                ).style("color: #64748b")
-                                ui.label(
-                                    "Ask about energy, PV forecast, EV charging, or anything about your home."
-                                ).classes("text-sm").style("color: #4a4a6a")
-                        else:
-                            for msg in state.chat_messages:
-                                _render_message(msg)
-
+            # Messages are appended incrementally: each change renders only
+            # the bubbles added since the last one, and only the typing
+            # indicator is rebuilt when the pending state toggles.
+            with chat_scroll:
+                with ui.column().classes("w-full p-4 gap-3"):
+                    with ui.column().classes(
+                        "w-full items-center justify-center py-16"
+                    ) as empty_hint:
+                        ui.icon("smart_toy").style(
+                            "color: #2d2d4a; font-size: 4rem"
+                        )
+                        ui.label("Start a conversation").classes(
+                            "text-lg mt-2"
+                        ).style("color: #64748b")
+                        ui.label(
+                            "Ask about energy, PV forecast, EV charging, or anything about your home."
+                        ).classes("text-sm").style("color: #4a4a6a")
+
+                    messages_col = ui.column().classes("w-full gap-3")
+
+                    @ui.refreshable
+                    def typing_indicator() -> None:
                         if state.chat_pending:
                             _render_typing_indicator()
 
-            chat_messages()
+                    typing_indicator()
+
+            rendered = 0
+
+            def append_new_messages() -> None:
+                nonlocal rendered
+                new_messages, rendered = state.chat_messages_since(rendered)
+                if not new_messages:
+                    return
+                empty_hint.set_visibility(False)
+                with messages_col:
+                    for msg in new_messages:
+                        _render_message(msg)
+                # Keep the client's history as bounded as the server's
+                excess = len(messages_col.default_slot.children) - CHAT_HISTORY_LIMIT
+                for _ in range(excess):
+                    messages_col.remove(0)
+
+            def on_chat_change() -> None:
+                append_new_messages()
+                typing_indicator.refresh()
+
+            append_new_messages()
 
             # Input area
             with ui.row().classes("w-full gap-2 items-end"):
@@ -106,8 +138,6 @@ def setup(
                         },
                     )
 
-                    chat_messages.refresh()
-
                 send_btn = (
                     ui.button(icon="send", on_click=send_message)
                     .props('round color="indigo-6"')
@@ -129,57 +159,56 @@ def setup(
                 send_btn.props('data-send-btn=""')
 
             # Quick prompts
-            with ui.row().classes("gap-2 flex-wrap"):
-                for prompt_text, prompt_icon in [
-                    ("Energy status", "bolt"),
-                    ("PV forecast", "wb_sunny"),
-                    ("EV charging status", "electric_car"),
-                    ("Weather forecast", "cloud"),
-                ]:
-
-                    def make_click(p: str) -> None:
-                        async def click() -> None:
-                            msg_input.value = p
-                            await send_message()
-
-                        return click
+            async def quick_send(prompt: str) -> None:
+                msg_input.value = prompt
+                await send_message()
 
+            with ui.row().classes("gap-2 flex-wrap"):
+                for prompt_text, prompt_icon in _QUICK_PROMPTS:
                     ui.button(
                         prompt_text,
                         icon=prompt_icon,
-                        on_click=make_click(prompt_text),
+                        on_click=partial(quick_send, prompt_text),
                     ).props('flat dense no-caps color="grey-6" size="sm"')
 
-            # Auto-refresh chat to show new messages and typing state
-            ui.timer(1.0, chat_messages.refresh)
+            # Re-render only when chat state changes (new message, typing
+            # state), for as long as this client is connected
+            state.add_chat_listener(on_chat_change)
+            client = ui.context.client
+            client.on_connect(lambda: state.add_chat_listener(on_chat_change))
+            client.on_disconnect(lambda: state.remove_chat_listener(on_chat_change))
+
+
+# Per-role bubble styling, built once (keyed by "is user"):
+# (column classes, card style, header icon, header color style, name)
+_BUBBLE_STYLES: dict[bool, tuple[str, str, str, str, str]] = {
+    True: (
+        "w-full items-end",
+        "background: #2d2d6a !important; border: 1px solid #4a4a8a !important",
+        "person",
+        f"color: {COLORS['primary']}",
+        "You",
+    ),
+    False: (
+        "w-full items-start",
+        "background: #1e1e2e !important; border: 1px solid #2d2d4a !important",
+        "smart_toy",
+        f"color: {COLORS['solar']}",
+        "Orchestrator",
+    ),
+}
 
 
 def _render_message(msg: dict) -> None:
     """Render a single chat message bubble."""
-    is_user = msg["role"] == "user"
-    align = "items-end" if is_user else "items-start"
-    bg = "#2d2d6a" if is_user else "#1e1e2e"
-    border = "#4a4a8a" if is_user else "#2d2d4a"
-    name = "You" if is_user else "Orchestrator"
-    icon = "person" if is_user else "smart_toy"
-    name_color = COLORS["primary"] if is_user else COLORS["solar"]
-
-    ts = msg.get("timestamp", 0)
-    time_str = time.strftime("%H:%M", time.localtime(ts)) if ts else ""
-
-    with ui.column().classes(f"w-full {align}"):
-        with (
-            ui.card()
-            .classes("p-3 max-w-[80%]")
-            .style(
-                f"background: {bg} !important; border: 1px solid {border} !important"
-            )
-        ):
+    column_cls, card_style, icon, name_style, name = _BUBBLE_STYLES[msg["role"] == "user"]
+    time_str = msg.get("time_str", "")
+
+    with ui.column().classes(column_cls):
+        with ui.card().classes("p-3 max-w-[80%]").style(card_style):
             with ui.row().classes("items-center gap-2 mb-1"):
-                ui.icon(icon).style(f"color: {name_color}; font-size: 1rem")
-                ui.label(name).classes("text-xs font-bold").style(
-                    f"color: {name_color}"
-                )
+                ui.icon(icon).style(f"{name_style}; font-size: 1rem")
+                ui.label(name).classes("text-xs font-bold").style(name_style)
                 ui.space()
                 ui.label(time_str).classes("text-xs").style("color: #4a4a6a")
 
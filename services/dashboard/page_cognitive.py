@@ -18,7 +18,7 @@ from typing import TYPE_CHECKING, Any
 import httpx
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, section_title
+from layout import COLORS, connected_timer, create_page_layout, section_title
 
 if TYPE_CHECKING:
     from config import DashboardSettings
@@ -488,4 +488,4 @@ def setup(state: "DashboardState", settings: "DashboardSettings") -> None:
             render_threads()
 
             # ── Auto-refresh every 2 minutes ──────────────────────────────
-            ui.timer(120.0, _on_refresh)
+            connected_timer(120.0, _on_refresh)
@@ -16,6 +16,11 @@ if TYPE_CHECKING:
     from state import DashboardState
 
 
+# Charge modes shown before HA has reported the input_select's options
+_DEFAULT_MODE_OPTIONS = ("Off", "PV Surplus", "Smart", "Eco", "Fast", "Manual")
+_DEFAULT_MODE_OPTION_SET = frozenset(_DEFAULT_MODE_OPTIONS)
+
+
 def setup(
     state: DashboardState,
     settings: DashboardSettings,
@@ -28,6 +33,16 @@ def setup(
     def controls_page() -> None:
         create_page_layout("/controls")
 
+        # One consistent read of every entity this page shows
+        snap = state.snapshot([
+            settings.ev_charge_mode_entity,
+            settings.ev_target_soc_entity,
+            settings.ev_departure_time_entity,
+            settings.ev_full_by_morning_entity,
+            settings.safe_mode_entity_id,
+        ])
+        mode_entity = snap[settings.ev_charge_mode_entity]
+
         with ui.column().classes("w-full max-w-5xl mx-auto p-6 gap-6"):
             # === EV Charging Controls ===
             section_title("EV Charging Controls")
@@ -45,26 +60,22 @@ def setup(
                         ui.label("Charge Mode").classes("text-sm w-40").style(
                             "color: #94a3b8"
                         )
-                        mode_options = state.get_entity_options(
-                            settings.ev_charge_mode_entity
-                        )
-                        if not mode_options:
-                            mode_options = [
-                                "Off",
-                                "PV Surplus",
-                                "Smart",
-                                "Eco",
-                                "Fast",
-                                "Manual",
-                            ]
-                        current_mode = state.get_entity_state(
-                            settings.ev_charge_mode_entity
+                        mode_options = mode_entity.get("attributes", {}).get(
+                            "options", []
                         )
+                        if mode_options:
+                            mode_option_set = state.get_entity_option_set(
+                                settings.ev_charge_mode_entity, mode_entity
+                            )
+                        else:
+                            mode_options = list(_DEFAULT_MODE_OPTIONS)
+                            mode_option_set = _DEFAULT_MODE_OPTION_SET
+                        current_mode = mode_entity.get("state", "unknown")
                         mode_select = (
                             ui.select(
                                 mode_options,
                                 value=current_mode
-                                if current_mode in mode_options
+                                if current_mode in mode_option_set
                                 else None,
                             )
                             .classes("flex-1")
@@ -86,8 +97,8 @@ def setup(
                         ui.label("Target SoC").classes("text-sm w-40").style(
                             "color: #94a3b8"
                         )
-                        current_soc = state.get_entity_float(
-                            settings.ev_target_soc_entity, 80
+                        current_soc = state.state_float(
+                            snap[settings.ev_target_soc_entity], 80
                         )
                         soc_label = (
                             ui.label(f"{current_soc:.0f}%")
@@ -122,8 +133,8 @@ def setup(
                         ui.label("Departure Time").classes("text-sm w-40").style(
                             "color: #94a3b8"
                         )
-                        dep_state = state.get_entity_state(
-                            settings.ev_departure_time_entity
+                        dep_state = snap[settings.ev_departure_time_entity].get(
+                            "state", "unknown"
                         )
                         dep_val = (
                             dep_state
@@ -156,8 +167,8 @@ def setup(
                         ui.label("Full by Morning").classes("text-sm w-40").style(
                             "color: #94a3b8"
                         )
-                        fbm_state = state.get_entity_state(
-                            settings.ev_full_by_morning_entity
+                        fbm_state = snap[settings.ev_full_by_morning_entity].get(
+                            "state", "unknown"
                         )
                         fbm_switch = ui.switch(
                             value=fbm_state == "on",
@@ -200,7 +211,7 @@ def setup(
                         color: str = "indigo-6",
                     ) -> None:
                         def send() -> None:
-                            nats.publish_sync(
+                            nats.publish_deferred(
                                 f"services.orchestrator.command.{service}",
                                 {"command": command},
                             )
@@ -256,7 +267,7 @@ def setup(
                         "color: #e2e8f0"
                     )
                     ui.space()
-                    safe_state = state.get_entity_state(settings.safe_mode_entity_id)
+                    safe_state = snap[settings.safe_mode_entity_id].get("state", "unknown")
                     safe_switch = ui.switch(
                         value=safe_state == "on",
                     ).props('color="amber-8"')
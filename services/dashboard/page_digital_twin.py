@@ -8,7 +8,7 @@ from typing import TYPE_CHECKING, Any
 import httpx
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, section_title
+from layout import COLORS, connected_timer, create_page_layout, section_title
 
 if TYPE_CHECKING:
     from config import DashboardSettings
@@ -284,7 +284,7 @@ def setup(state: "DashboardState", settings: "DashboardSettings") -> None:
             render_thermal_map()
 
             # Auto-refresh every 30 s
-            ui.timer(
+            connected_timer(
                 30.0,
                 lambda: (
                     render_recommendation.refresh(),
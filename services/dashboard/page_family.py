@@ -13,7 +13,7 @@ from typing import TYPE_CHECKING, Any
 import httpx
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, section_title
+from layout import COLORS, connected_timer, create_page_layout, section_title
 
 if TYPE_CHECKING:
     from config import DashboardSettings
@@ -440,7 +440,7 @@ def setup(state: "DashboardState", settings: "DashboardSettings") -> None:
                 _votes_panel(items, on_vote=_on_vote)
 
             render_main()
-            ui.timer(60.0, _on_refresh)
+            connected_timer(60.0, _on_refresh)
 
     # ── Nicole's Simplified View ──────────────────────────────────────────────
 
@@ -529,7 +529,7 @@ def setup(state: "DashboardState", settings: "DashboardSettings") -> None:
                         )
 
             render_nicole()
-            ui.timer(120.0, _on_refresh)
+            connected_timer(120.0, _on_refresh)
 
             ui.button("Refresh", icon="refresh", on_click=_on_refresh).props(
                 "flat color=primary"
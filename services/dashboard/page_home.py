@@ -2,19 +2,99 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, metric_card, section_title
+from layout import (
+    COLORS,
+    create_page_layout,
+    metric_card,
+    refresh_on_change,
+    section_title,
+)
 
 if TYPE_CHECKING:
     from config import DashboardSettings
     from state import DashboardState
 
 
+@lru_cache(maxsize=256)
+def _pv_progress(today_q: int, remaining_q: int) -> tuple[float, str]:
+    """Today's PV progress fraction and label, keyed on 0.1 kWh steps."""
+    today = today_q / 10
+    remaining = remaining_q / 10
+    produced = today - remaining if remaining > 0 else today
+    progress = max(0.0, min(produced / today, 1.0)) if today > 0 else 0.0
+    return progress, f"{progress * 100:.0f}%"
+
+
 def setup(state: DashboardState, settings: DashboardSettings) -> None:
     """Register the home page."""
+    # Resolved once here rather than on every render
+    pv_e = settings.pv_power_entity
+    grid_e = settings.grid_power_entity
+    bat_e = settings.battery_power_entity
+    bat_soc_e = settings.battery_soc_entity
+    house_e = settings.house_power_entity
+    ev_power_e = settings.ev_charge_power_entity
+    ev_soc_e = settings.ev_soc_entity
+    ev_mode_e = settings.ev_charge_mode_entity
+    pv_today_e = settings.pv_forecast_today_entity
+    pv_tomorrow_e = settings.pv_forecast_tomorrow_entity
+    pv_remaining_e = settings.pv_forecast_remaining_entity
+
+    solar_color = COLORS["solar"]
+    ev_color = COLORS["ev"]
+    grid_export_color = COLORS["grid_export"]
+    grid_import_color = COLORS["grid_import"]
+    battery_color = COLORS["battery"]
+    house_color = COLORS["house"]
+    online_color = COLORS["online"]
+    offline_color = COLORS["offline"]
+    solar_style = f"color: {solar_color}"
+    ev_style = f"color: {ev_color}"
+    primary_style = f"color: {COLORS['primary']}"
+
+    state.register_entity_group("energy", frozenset({
+        pv_e,
+        grid_e,
+        bat_e,
+        bat_soc_e,
+        house_e,
+        ev_power_e,
+        ev_soc_e,
+    }))
+    state.register_entity_group("pv_forecast", frozenset({
+        pv_today_e,
+        pv_tomorrow_e,
+        pv_remaining_e,
+    }))
+    state.register_entity_group("ev_entities", frozenset({
+        ev_mode_e,
+        ev_soc_e,
+        ev_power_e,
+    }))
+    # Display strings rendered once per HA update, not on every refresh
+    state.register_entity_format("w", [
+        pv_e,
+        house_e,
+        ev_power_e,
+    ])
+    state.register_entity_format("w_abs", [
+        grid_e,
+        bat_e,
+    ])
+    state.register_entity_format("pct", [
+        bat_soc_e,
+        ev_soc_e,
+    ])
+    state.register_entity_format("kwh", [
+        pv_today_e,
+        pv_tomorrow_e,
+        pv_remaining_e,
+    ])
 
     @ui.page("/")
     def home_page() -> None:
@@ -24,91 +104,72 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
             # === Energy metrics row ===
             section_title("Energy Overview")
 
-            @ui.refreshable
-            def energy_cards() -> None:
-                pv = state.get_entity_float(settings.pv_power_entity)
-                grid = state.get_entity_float(settings.grid_power_entity)
-                bat_power = state.get_entity_float(settings.battery_power_entity)
-                bat_soc = state.get_entity_float(settings.battery_soc_entity)
-                house = state.get_entity_float(settings.house_power_entity)
-                ev_power = state.get_entity_float(settings.ev_charge_power_entity)
-                ev_soc = state.get_entity_float(settings.ev_soc_entity)
-
-                with ui.row().classes("w-full gap-4 flex-wrap"):
-                    # PV
-                    metric_card(
-                        "wb_sunny",
-                        "Solar PV",
-                        f"{pv:,.0f}",
-                        "W",
-                        COLORS["solar"],
+            # Cards are built once; updates only change their text/colors
+            with ui.row().classes("w-full gap-4 flex-wrap"):
+                pv_card = metric_card("wb_sunny", "Solar PV", "", "W", solar_color)
+                grid_card = metric_card(
+                    "north_east", "Grid Export", "", "W", grid_export_color,
+                )
+                bat_card = metric_card(
+                    "battery_charging_full", "Battery", "", "W", battery_color,
+                )
+                house_card = metric_card("home", "House", "", "W", house_color)
+                ev_card = metric_card("electric_car", "EV Charging", "", "W", ev_color)
+
+            def update_energy() -> None:
+                fmt = state.get_entity_formatted
+                grid = state.get_entity_float(grid_e)
+                bat_power = state.get_entity_float(bat_e)
+                ev_soc = state.get_entity_float(ev_soc_e)
+
+                pv_card.update(fmt(pv_e))
+
+                # Grid — positive = export, negative = import
+                if grid >= 0:
+                    grid_card.update(
+                        fmt(grid_e),
+                        icon="north_east",
+                        title="Grid Export",
+                        color=grid_export_color,
                     )
-
-                    # Grid — positive = export, negative = import
-                    if grid >= 0:
-                        metric_card(
-                            "north_east",
-                            "Grid Export",
-                            f"{grid:,.0f}",
-                            "W",
-                            COLORS["grid_export"],
-                        )
-                    else:
-                        metric_card(
-                            "south_west",
-                            "Grid Import",
-                            f"{abs(grid):,.0f}",
-                            "W",
-                            COLORS["grid_import"],
-                        )
-
-                    # Battery
-                    if bat_power > 50:
-                        bat_label = "Charging"
-                    elif bat_power < -50:
-                        bat_label = "Discharging"
-                    else:
-                        bat_label = "Idle"
-                    metric_card(
-                        "battery_charging_full",
-                        f"Battery {bat_soc:.0f}%",
-                        f"{abs(bat_power):,.0f}",
-                        f"W \u00b7 {bat_label}",
-                        COLORS["battery"],
+                else:
+                    grid_card.update(
+                        fmt(grid_e),
+                        icon="south_west",
+                        title="Grid Import",
+                        color=grid_import_color,
                     )
 
-                    # House
-                    metric_card(
-                        "home",
-                        "House",
-                        f"{house:,.0f}",
-                        "W",
-                        COLORS["house"],
-                    )
+                # Battery
+                if bat_power > 50:
+                    bat_label = "Charging"
+                elif bat_power < -50:
+                    bat_label = "Discharging"
+                else:
+                    bat_label = "Idle"
+                bat_card.update(
+                    fmt(bat_e),
+                    title=f"Battery {fmt(bat_soc_e)}%",
+                    unit=f"W \u00b7 {bat_label}",
+                )
 
-                    # EV
-                    ev_sub = f"SoC {ev_soc:.0f}%" if ev_soc > 0 else ""
-                    metric_card(
-                        "electric_car",
-                        "EV Charging",
-                        f"{ev_power:,.0f}",
-                        "W",
-                        COLORS["ev"],
-                        subtitle=ev_sub,
-                    )
+                house_card.update(fmt(house_e))
 
-            energy_cards()
+                ev_sub = f"SoC {fmt(ev_soc_e)}%" if ev_soc > 0 else ""
+                ev_card.update(fmt(ev_power_e), subtitle=ev_sub)
+
+            update_energy()
 
             # === PV Forecast ===
             @ui.refreshable
             def pv_forecast_section() -> None:
-                today = state.get_entity_float(settings.pv_forecast_today_entity)
-                tomorrow = state.get_entity_float(settings.pv_forecast_tomorrow_entity)
-                remaining = state.get_entity_float(settings.pv_forecast_remaining_entity)
+                today = state.get_entity_float(pv_today_e)
+                remaining = state.get_entity_float(pv_remaining_e)
+                fmt = state.get_entity_formatted
 
                 with ui.card().classes("w-full p-5"):
                     with ui.row().classes("items-center gap-2 mb-3"):
-                        ui.icon("wb_sunny").style(f"color: {COLORS['solar']}")
+                        ui.icon("wb_sunny").style(solar_style)
                         ui.label("PV Forecast").classes("text-lg font-bold").style(
                             "color: #e2e8f0"
                         )
@@ -116,24 +177,25 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
                     with ui.row().classes("w-full gap-8"):
                         with ui.column().classes("gap-1"):
                             ui.label("Today").style("color: #94a3b8")
-                            ui.label(f"{today:.1f} kWh").classes(
+                            ui.label(f"{fmt(pv_today_e)} kWh").classes(
                                 "text-2xl font-bold"
-                            ).style(f"color: {COLORS['solar']}")
+                            ).style(solar_style)
                             if remaining > 0:
-                                ui.label(f"{remaining:.1f} kWh remaining").classes(
-                                    "text-sm"
-                                ).style("color: #64748b")
+                                ui.label(
+                                    f"{fmt(pv_remaining_e)} kWh remaining"
+                                ).classes("text-sm").style("color: #64748b")
 
                         with ui.column().classes("gap-1"):
                             ui.label("Tomorrow").style("color: #94a3b8")
-                            ui.label(f"{tomorrow:.1f} kWh").classes(
+                            ui.label(f"{fmt(pv_tomorrow_e)} kWh").classes(
                                 "text-2xl font-bold"
-                            ).style(f"color: {COLORS['solar']}")
+                            ).style(solar_style)
 
                     # Progress bar for today
                     if today > 0:
-                        produced = today - remaining if remaining > 0 else today
-                        progress = min(produced / today, 1.0) if today > 0 else 0
+                        progress, progress_str = _pv_progress(
+                            round(today * 10), round(remaining * 10),
+                        )
                         with ui.row().classes("w-full items-center gap-3 mt-4"):
                             ui.label("Progress").classes("text-sm").style(
                                 "color: #64748b"
@@ -141,9 +203,9 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
                             ui.linear_progress(
                                 value=progress, show_value=False
                             ).props("rounded color=amber").classes("flex-1")
-                            ui.label(f"{progress * 100:.0f}%").classes(
+                            ui.label(progress_str).classes(
                                 "text-sm font-bold"
-                            ).style(f"color: {COLORS['solar']}")
+                            ).style(solar_style)
 
             pv_forecast_section()
 
@@ -153,9 +215,9 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
                 ev = state.ev_charging
                 if not ev:
                     # Fall back to HA entities
-                    mode = state.get_entity_state(settings.ev_charge_mode_entity)
-                    soc = state.get_entity_float(settings.ev_soc_entity)
-                    power = state.get_entity_float(settings.ev_charge_power_entity)
+                    mode = state.get_entity_state(ev_mode_e)
+                    soc = state.get_entity_float(ev_soc_e)
+                    power = state.get_entity_float(ev_power_e)
                     if mode == "unknown" and soc == 0 and power == 0:
                         return
                     ev = {
@@ -166,7 +228,7 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
 
                 with ui.card().classes("w-full p-5"):
                     with ui.row().classes("items-center gap-2 mb-3"):
-                        ui.icon("electric_car").style(f"color: {COLORS['ev']}")
+                        ui.icon("electric_car").style(ev_style)
                         ui.label("EV Charging").classes("text-lg font-bold").style(
                             "color: #e2e8f0"
                         )
@@ -188,37 +250,30 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
             # === Services mini-overview ===
             @ui.refreshable
             def services_mini() -> None:
+                names = state.sorted_service_names()
+                services = state.services
                 with ui.card().classes("w-full p-4"):
                     with ui.row().classes("items-center gap-2 mb-3"):
-                        ui.icon("dns").style(f"color: {COLORS['primary']}")
+                        ui.icon("dns").style(primary_style)
                         ui.label("Services").classes("text-lg font-bold").style(
                             "color: #e2e8f0"
                         )
                         ui.space()
-                        online = sum(
-                            1
-                            for s in state.services.values()
-                            if s.get("status") == "online"
-                        )
-                        total = len(state.services)
+                        online = state.online_count
+                        total = len(services)
                         ui.label(f"{online}/{total} online").classes("text-sm").style(
                             "color: #94a3b8"
                         )
 
-                    if not state.services:
+                    if not services:
                         ui.label("Waiting for service heartbeats...").style(
                             "color: #64748b"
                         )
                     else:
                         with ui.row().classes("gap-3 flex-wrap"):
-                            for name in sorted(state.services):
-                                svc = state.services[name]
-                                status = svc.get("status", "unknown")
-                                color = (
-                                    COLORS["online"]
-                                    if status == "online"
-                                    else COLORS["offline"]
-                                )
+                            for name in names:
+                                svc = services[name]
+                                color = online_color if svc.status == "online" else offline_color
                                 with ui.row().classes("items-center gap-1"):
                                     ui.icon("circle").style(
                                         f"color: {color}; font-size: 0.6rem"
@@ -229,16 +284,13 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
 
             services_mini()
 
-            # === Auto-refresh timer ===
-            ui.timer(
-                settings.ui_refresh_interval,
-                lambda: (
-                    energy_cards.refresh(),
-                    pv_forecast_section.refresh(),
-                    ev_section.refresh(),
-                    services_mini.refresh(),
-                ),
-            )
+            # === Auto-refresh (debounced, only sections whose data changed) ===
+            refresh_on_change(state, [
+                (update_energy, ("energy",)),
+                (pv_forecast_section.refresh, ("pv_forecast",)),
+                (ev_section.refresh, ("ev", "ev_entities")),
+                (services_mini.refresh, ("services",)),
+            ])
 
 
 def _ev_stat(label: str, value: str) -> None:
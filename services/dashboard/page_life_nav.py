@@ -19,7 +19,7 @@ from typing import TYPE_CHECKING, Any
 import httpx
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, section_title
+from layout import COLORS, connected_timer, create_page_layout, section_title
 
 if TYPE_CHECKING:
     from config import DashboardSettings
@@ -896,7 +896,7 @@ def setup(state: "DashboardState", settings: "DashboardSettings") -> None:
             render_optimizer()
 
             # ── Auto-refresh every 60 s ────────────────────────────────────
-            ui.timer(60.0, _on_refresh)
+            connected_timer(60.0, _on_refresh)
 
         # ── Dialogs ────────────────────────────────────────────────────────
         # Defined after layout so all refreshable names are in scope.
@@ -7,11 +7,17 @@ from typing import TYPE_CHECKING
 
 from nicegui import ui
 
-from layout import COLORS, create_page_layout, section_title
+from layout import (
+    COLORS,
+    connected_timer,
+    create_page_layout,
+    refresh_on_change,
+    section_title,
+)
 
 if TYPE_CHECKING:
     from config import DashboardSettings
-    from state import DashboardState
+    from state import DashboardState, ServiceRecord
 
 # Service display metadata
 SERVICE_META: dict[str, dict[str, str]] = {
@@ -25,6 +31,13 @@ SERVICE_META: dict[str, dict[str, str]] = {
 
 DEFAULT_META = {"icon": "memory", "color": COLORS["text_muted"]}
 
+# Status -> (label, indicator color)
+STATUS_DISPLAY: dict[str, tuple[str, str]] = {
+    "online": ("Online", COLORS["online"]),
+    "offline": ("Offline", COLORS["offline"]),
+    "unknown": ("Unknown", COLORS["offline"]),
+}
+
 
 def setup(state: DashboardState, settings: DashboardSettings) -> None:
     """Register the services page."""
@@ -38,18 +51,23 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
 
             @ui.refreshable
             def service_grid() -> None:
-                if not state.services:
+                # Names first: the services dict only grows, so the newer
+                # snapshot always covers every name
+                names = state.sorted_service_names()
+                services = state.services
+                if not services:
                     with ui.card().classes("w-full p-8"):
                         ui.label(
                             "No services detected yet. Waiting for MQTT heartbeats..."
                         ).style("color: #64748b")
                     return
 
+                now = time.time()
                 with ui.row().classes("w-full gap-4 flex-wrap"):
-                    for name in sorted(state.services):
-                        svc = state.services[name]
+                    for name in names:
+                        svc = services[name]
                         meta = SERVICE_META.get(name, DEFAULT_META)
-                        _service_card(name, svc, meta)
+                        _service_card(name, svc, meta, now)
 
             service_grid()
 
@@ -89,26 +107,27 @@ def setup(state: DashboardState, settings: DashboardSettings) -> None:
 
             orchestrator_section()
 
-            ui.timer(
-                settings.ui_refresh_interval,
-                lambda: (service_grid.refresh(), orchestrator_section.refresh()),
-            )
+            refresh_on_change(state, [(orchestrator_section.refresh, ("orchestrator",))])
+            # The grid shows "last seen" ages, so it stays on a clock
+            connected_timer(settings.ui_refresh_interval, service_grid.refresh)
 
 
 def _service_card(
-    name: str, svc: dict, meta: dict[str, str],
+    name: str, svc: ServiceRecord, meta: dict[str, str], now: float,
 ) -> None:
     """Render a service health card."""
-    status = svc.get("status", "unknown")
+    status = svc.status
     is_online = status == "online"
-    status_color = COLORS["online"] if is_online else COLORS["offline"]
+    display = STATUS_DISPLAY.get(status)
+    if display is None:
+        display = (str(status).capitalize(), COLORS["offline"])
+    status_label, status_color = display
     accent = meta["color"] if is_online else COLORS["text_dim"]
 
-    uptime_s = svc.get("uptime_seconds", 0)
-    uptime_str = _format_uptime(uptime_s)
-    memory_mb = svc.get("memory_mb", 0)
-    last_seen = svc.get("last_seen", 0)
-    age = time.time() - last_seen if last_seen else 0
+    uptime_str = svc.uptime_str
+    memory_mb = svc.memory_mb
+    last_seen = svc.last_seen
+    age = now - last_seen if last_seen else 0
     age_str = f"{age:.0f}s ago" if age < 120 else f"{age / 60:.0f}m ago"
 
     with ui.card().classes("p-4 min-w-[250px] flex-1 metric-card").style(
@@ -122,7 +141,7 @@ def _service_card(
             ui.label(name).classes("text-base font-bold").style("color: #e2e8f0")
 
         with ui.column().classes("gap-1"):
-            _info_row("Status", status.capitalize(), status_color)
+            _info_row("Status", status_label, status_color)
             _info_row("Uptime", uptime_str)
             if memory_mb > 0:
                 _info_row("Memory", f"{memory_mb:.1f} MB")
@@ -139,15 +158,3 @@ def _stat_block(label: str, value: str) -> None:
     with ui.column().classes("gap-0"):
         ui.label(label).classes("text-xs uppercase").style("color: #64748b")
         ui.label(value).classes("text-lg font-bold").style("color: #e2e8f0")
-
-
-def _format_uptime(seconds: float) -> str:
-    if seconds < 60:
-        return f"{seconds:.0f}s"
-    if seconds < 3600:
-        return f"{seconds / 60:.0f}m"
-    hours = seconds / 3600
-    if hours < 24:
-        return f"{hours:.1f}h"
-    days = hours / 24
-    return f"{days:.1f}d"
@@ -1,20 +1,93 @@
 """Shared state manager for the dashboard.
 
 Collects data from MQTT subscriptions and HA API polling.
-All data is stored in plain dicts for thread-safe access from the NiceGUI UI.
+All data is stored in plain dicts. Writers serialize on a lock; `services` and
+`ha_entities` are replaced copy-on-write so UI readers never need the lock.
 """
 
 from __future__ import annotations
 
+import asyncio
+import sys
 import threading
 import time
 import uuid
+from collections import Counter, deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
 from typing import Any
 
 from shared.log import get_logger
 
 logger = get_logger("dashboard-state")
 
+# Chat messages kept in memory (and rendered per client); older ones drop off
+CHAT_HISTORY_LIMIT = 500
+
+# Coalescing window for bursts of HA entity updates (startup, reconnect)
+HA_UPDATE_WINDOW = 0.05
+
+
+@lru_cache(maxsize=4096)
+def _fmt_hhmm(minute_bucket: int) -> str:
+    """Format a Unix minute as local HH:MM (messages in a burst share one)."""
+    return time.strftime("%H:%M", time.localtime(minute_bucket * 60))
+
+
+def format_uptime(seconds: float) -> str:
+    """Format an uptime in seconds as a short human-readable string.
+
+    Long-running services (the common case) are checked first; minutes and
+    seconds stay in integer arithmetic.
+    """
+    s = int(seconds)
+    if s >= 86400:
+        return f"{s / 86400:.1f}d"
+    if s >= 3600:
+        return f"{s / 3600:.1f}h"
+    if s >= 60:
+        return f"{s // 60}m"
+    return f"{s}s"
+
+
+# Display formats that can be precomputed per entity at write time
+ENTITY_FORMATS: dict[str, Callable[[float], str]] = {
+    "w": lambda v: f"{v:,.0f}",
+    "w_abs": lambda v: f"{abs(v):,.0f}",
+    "pct": lambda v: f"{v:.0f}",
+    "kwh": lambda v: f"{v:.1f}",
+}
+
+
+@dataclass(slots=True)
+class ServiceRecord:
+    """Latest heartbeat of one service."""
+
+    status: str = "unknown"
+    uptime_seconds: float = 0.0
+    memory_mb: float = 0.0
+    last_seen: float = 0.0
+    # Formatted once per heartbeat rather than on every render
+    uptime_str: str = "0s"
+
+
+# Common non-numeric HA states, rejected without raising and catching
+_NON_NUMERIC_STATES = frozenset({"unknown", "unavailable", "", "on", "off"})
+
+
+def _parse_float(value: Any) -> float | None:
+    """Parse an HA state string; "unknown", "unavailable" etc. give None."""
+    if type(value) is float:
+        return value
+    if isinstance(value, str) and value in _NON_NUMERIC_STATES:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
 
 class DashboardState:
     """Thread-safe shared state updated by MQTT and HA polling."""
@@ -22,8 +95,12 @@ class DashboardState:
     def __init__(self) -> None:
         self._lock = threading.Lock()
 
-        # Service heartbeats: {service_name: {status, uptime_seconds, ...}}
-        self.services: dict[str, dict[str, Any]] = {}
+        # Service heartbeats: {service_name: ServiceRecord}
+        self.services: dict[str, ServiceRecord] = {}
+        # Rebuilt only when a new service name appears
+        self._service_names_sorted: tuple[str, ...] = ()
+        # Services whose latest heartbeat says "online", kept in step with updates
+        self.online_count: int = 0
 
         # Latest MQTT payloads per topic
         self.pv_forecast: dict[str, Any] = {}
@@ -35,17 +112,40 @@ class DashboardState:
 
         # HA entity states: {entity_id: {state, attributes, last_updated}}
         self.ha_entities: dict[str, dict[str, Any]] = {}
+        # Derived option sets per entity, keyed to the entity dict they came
+        # from and dropped whenever the entity updates
+        self._entity_options_cache: dict[
+            str, tuple[dict[str, Any], frozenset[str]]
+        ] = {}
+        # State parsed as float once per update (None when not numeric)
+        self._entity_floats: dict[str, float | None] = {}
+        # Registered display format per entity and the string last rendered
+        self._entity_formats: dict[str, Callable[[float], str]] = {}
+        self._entity_formatted: dict[str, str] = {}
+        # Updates not yet applied, flushed once per HA_UPDATE_WINDOW
+        self._pending_updates: dict[str, dict[str, Any]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._ha_listeners: set[Callable[[set[str]], None]] = set()
 
         # Chat
-        self.chat_messages: list[dict[str, Any]] = []
+        self.chat_messages: deque[dict[str, Any]] = deque(maxlen=CHAT_HISTORY_LIMIT)
+        # Messages ever appended, including those dropped from the deque
+        self.chat_total: int = 0
         self.chat_pending: bool = False
         self.chat_pending_id: str = ""
+        self._chat_listeners: set[Callable[[], None]] = set()
 
         # Digital Twin
         self.digital_twin_simulation: dict[str, Any] = {}
         self.digital_twin_house_state: dict[str, Any] = {}
         self.digital_twin_recommendation: dict[str, Any] = {}
 
+        # Per-section change counters; pages skip refreshes when unchanged
+        self._versions: Counter[str] = Counter()
+        # (section, entity_ids): HA updates bump the sections they touch
+        self._entity_groups: list[tuple[str, frozenset[str]]] = []
+        self._change_listeners: set[Callable[[], None]] = set()
+
         # Timestamps
         self.last_mqtt_update: float = 0
         self.last_ha_update: float = 0
@@ -56,65 +156,207 @@ class DashboardState:
 
     def update_service(self, service_name: str, data: dict[str, Any]) -> None:
         with self._lock:
-            self.services[service_name] = {
-                **data,
-                "last_seen": time.time(),
-            }
+            prev = self.services.get(service_name)
+            is_new = prev is None
+            was_online = not is_new and prev.status == "online"
+            uptime = data.get("uptime_seconds", 0)
+            status = data.get("status", "unknown")
+            record = ServiceRecord(
+                # Interned: few distinct values, compared on every render
+                status=sys.intern(status) if isinstance(status, str) else status,
+                uptime_seconds=uptime,
+                memory_mb=data.get("memory_mb", 0),
+                last_seen=time.time(),
+                uptime_str=format_uptime(uptime),
+            )
+            # Copy-on-write: readers take ``state.services`` once and get a
+            # consistent view without locking
+            services = dict(self.services)
+            services[service_name] = record
+            self.services = services
+            self.online_count += (record.status == "online") - was_online
+            if is_new:
+                self._service_names_sorted = tuple(sorted(self.services))
+            self._versions["services"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
+
+    def sorted_service_names(self) -> tuple[str, ...]:
+        """Service names in display order, without sorting on every refresh."""
+        return self._service_names_sorted
 
     def update_pv_forecast(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.pv_forecast = data
+            self._versions["pv"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_ev_charging(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.ev_charging = data
+            self._versions["ev"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_ev_forecast(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.ev_forecast_plan = data
+            self._versions["ev_forecast"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_ev_vehicle(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.ev_vehicle = data
+            self._versions["ev_vehicle"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_orchestrator(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.orchestrator_activity = data
+            self._versions["orchestrator"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_health(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.health_status = data
+            self._versions["health"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_digital_twin_simulation(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.digital_twin_simulation = data
+            self._versions["digital_twin"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_digital_twin_house_state(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.digital_twin_house_state = data
+            self._versions["digital_twin"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
 
     def update_digital_twin_recommendation(self, data: dict[str, Any]) -> None:
         with self._lock:
             self.digital_twin_recommendation = data
+            self._versions["digital_twin"] += 1
             self.last_mqtt_update = time.time()
+        self._notify_change()
+
+    def register_entity_group(self, section: str, entity_ids: frozenset[str]) -> None:
+        """Bump *section*'s version whenever one of *entity_ids* updates."""
+        with self._lock:
+            self._entity_groups = [
+                (name, ids) for name, ids in self._entity_groups if name != section
+            ]
+            self._entity_groups.append((section, entity_ids))
+
+    def add_change_listener(self, callback: Callable[[], None]) -> None:
+        """Call *callback* after any update that bumps a section version."""
+        with self._lock:
+            self._change_listeners.add(callback)
+
+    def remove_change_listener(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            self._change_listeners.discard(callback)
+
+    def _notify_change(self) -> None:
+        with self._lock:
+            listeners = list(self._change_listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception:
+                logger.debug("change_listener_failed", exc_info=True)
+
+    def version(self, *sections: str) -> int:
+        """Combined change counter of *sections* (compare, don't interpret)."""
+        return sum(self._versions[section] for section in sections)
 
     # ------------------------------------------------------------------
     # HA entity state
     # ------------------------------------------------------------------
 
     def update_ha_entity(self, entity_id: str, data: dict[str, Any]) -> None:
+        """Queue an entity update; a burst is applied and notified once.
+
+        Outside a running event loop the update is applied immediately.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            self._pending_updates[entity_id] = data
+            if loop is not None:
+                if self._flush_handle is None:
+                    self._flush_handle = loop.call_later(
+                        HA_UPDATE_WINDOW, self._flush_ha_updates,
+                    )
+                return
+        self._flush_ha_updates()
+
+    def _flush_ha_updates(self) -> None:
         with self._lock:
-            self.ha_entities[entity_id] = data
+            pending, self._pending_updates = self._pending_updates, {}
+            self._flush_handle = None
+            if not pending:
+                return
+            # Copy-on-write, once per flush (see update_service)
+            self.ha_entities = {**self.ha_entities, **pending}
+            for entity_id, data in pending.items():
+                self._entity_options_cache.pop(entity_id, None)
+                state_val = data.get("state")
+                if isinstance(state_val, str):
+                    # "on"/"off"/"unknown"… share one object, so == hits
+                    # the identity fast path
+                    data["state"] = state_val = sys.intern(state_val)
+                value = _parse_float(state_val)
+                self._entity_floats[entity_id] = value
+                fmt = self._entity_formats.get(entity_id)
+                if fmt is not None:
+                    self._entity_formatted[entity_id] = fmt(0.0 if value is None else value)
+            self._versions["ha"] += 1
+            for section, entity_ids in self._entity_groups:
+                if not entity_ids.isdisjoint(pending):
+                    self._versions[section] += 1
             self.last_ha_update = time.time()
+            listeners = list(self._ha_listeners)
+        changed = set(pending)
+        for callback in listeners:
+            try:
+                callback(changed)
+            except Exception:
+                logger.debug("ha_listener_failed", exc_info=True)
+        self._notify_change()
+
+    def add_ha_listener(self, callback: Callable[[set[str]], None]) -> None:
+        """Call *callback* with the changed entity IDs after each flush."""
+        with self._lock:
+            self._ha_listeners.add(callback)
+
+    def remove_ha_listener(self, callback: Callable[[set[str]], None]) -> None:
+        with self._lock:
+            self._ha_listeners.discard(callback)
+
+    def snapshot(self, entity_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Read several cached HA entities from one consistent view.
+
+        Missing entities map to an empty dict.
+        """
+        entities = self.ha_entities
+        return {eid: entities.get(eid, {}) for eid in entity_ids}
+
+    @staticmethod
+    def state_float(entity: dict[str, Any], default: float = 0.0) -> float:
+        """Parse an HA entity dict's state as float."""
+        value = _parse_float(entity.get("state"))
+        return default if value is None else value
 
     def get_entity_state(self, entity_id: str) -> str:
         """Get cached HA entity state string."""
@@ -122,14 +364,22 @@ class DashboardState:
         return entity.get("state", "unknown")
 
     def get_entity_float(self, entity_id: str, default: float = 0.0) -> float:
-        """Get cached HA entity state as float."""
-        try:
-            val = self.get_entity_state(entity_id)
-            if val in ("unknown", "unavailable", ""):
-                return default
-            return float(val)
-        except (ValueError, TypeError):
-            return default
+        """Get cached HA entity state as float (parsed when it was stored)."""
+        value = self._entity_floats.get(entity_id)
+        return default if value is None else value
+
+    def register_entity_format(self, fmt: str, entity_ids: list[str]) -> None:
+        """Pre-render *entity_ids* with ENTITY_FORMATS[*fmt*] on every update."""
+        func = ENTITY_FORMATS[fmt]
+        with self._lock:
+            for entity_id in entity_ids:
+                self._entity_formats[entity_id] = func
+                value = self._entity_floats.get(entity_id)
+                self._entity_formatted[entity_id] = func(0.0 if value is None else value)
+
+    def get_entity_formatted(self, entity_id: str) -> str:
+        """Display string of a registered entity (non-numeric states show as 0)."""
+        return self._entity_formatted[entity_id]
 
     def get_entity_attributes(self, entity_id: str) -> dict[str, Any]:
         """Get cached HA entity attributes."""
@@ -141,17 +391,61 @@ class DashboardState:
         attrs = self.get_entity_attributes(entity_id)
         return attrs.get("options", [])
 
+    def get_entity_option_set(
+        self, entity_id: str, entity: dict[str, Any] | None = None
+    ) -> frozenset[str]:
+        """Get an input_select's options as a set for membership tests.
+
+        Pass *entity* (e.g. from snapshot()) to derive the set from that
+        exact entity dict rather than a fresh read of ha_entities.
+        """
+        if entity is None:
+            entity = self.ha_entities.get(entity_id, {})
+        cached = self._entity_options_cache.get(entity_id)
+        if cached is not None and cached[0] is entity:
+            return cached[1]
+        options = frozenset(entity.get("attributes", {}).get("options", []))
+        self._entity_options_cache[entity_id] = (entity, options)
+        return options
+
     # ------------------------------------------------------------------
     # Chat
     # ------------------------------------------------------------------
 
+    def add_chat_listener(self, callback: Callable[[], None]) -> None:
+        """Call *callback* whenever chat messages or the pending flag change."""
+        with self._lock:
+            self._chat_listeners.add(callback)
+
+    def remove_chat_listener(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            self._chat_listeners.discard(callback)
+
+    def _notify_chat(self) -> None:
+        with self._lock:
+            listeners = list(self._chat_listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception:
+                logger.debug("chat_listener_failed", exc_info=True)
+
+    @staticmethod
+    def _chat_entry(role: str, content: str) -> dict[str, Any]:
+        # The display time is formatted once here rather than on every render
+        ts = time.time()
+        return {
+            "role": role,
+            "content": content,
+            "timestamp": ts,
+            "time_str": _fmt_hhmm(int(ts) // 60),
+        }
+
     def add_chat_message(self, role: str, content: str) -> None:
         with self._lock:
-            self.chat_messages.append({
-                "role": role,
-                "content": content,
-                "timestamp": time.time(),
-            })
+            self.chat_messages.append(self._chat_entry(role, content))
+            self.chat_total += 1
+        self._notify_chat()
 
     def send_chat_request(self) -> str:
         """Mark chat as pending and return a new request ID."""
@@ -159,6 +453,7 @@ class DashboardState:
         with self._lock:
             self.chat_pending = True
             self.chat_pending_id = request_id
+        self._notify_chat()
         return request_id
 
     def receive_chat_response(self, request_id: str, response: str) -> None:
@@ -167,8 +462,25 @@ class DashboardState:
             if self.chat_pending_id == request_id:
                 self.chat_pending = False
                 self.chat_pending_id = ""
-            self.chat_messages.append({
-                "role": "assistant",
-                "content": response,
-                "timestamp": time.time(),
-            })
+            self.chat_messages.append(self._chat_entry("assistant", response))
+            self.chat_total += 1
+        self._notify_chat()
+
+    def get_recent_messages(self, n: int = 50) -> list[dict[str, Any]]:
+        """The last *n* chat messages, oldest first."""
+        with self._lock:
+            start = max(0, len(self.chat_messages) - n)
+            return list(islice(self.chat_messages, start, None))
+
+    def chat_messages_since(self, seen: int) -> tuple[list[dict[str, Any]], int]:
+        """Messages appended after the first *seen*, plus the new total.
+
+        Messages that already dropped out of the history are skipped.
+        """
+        with self._lock:
+            total = self.chat_total
+            new = min(total - seen, len(self.chat_messages))
+            if new <= 0:
+                return [], total
+            start = len(self.chat_messages) - new
+            return list(islice(self.chat_messages, start, None)), total
@@ -0,0 +1,204 @@
+"""Tests for DashboardState."""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+# Make shared/ importable
+_repo_root = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if _repo_root not in sys.path:
+    sys.path.insert(0, _repo_root)
+
+# Make dashboard/ importable
+_dashboard_path = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+if _dashboard_path not in sys.path:
+    sys.path.insert(0, _dashboard_path)
+
+from state import (  # noqa: E402
+    CHAT_HISTORY_LIMIT,
+    HA_UPDATE_WINDOW,
+    DashboardState,
+    format_uptime,
+)
+
+
+def test_update_outside_loop_applies_immediately():
+    state = DashboardState()
+    state.update_ha_entity("sensor.a", {"state": "1"})
+    assert state.get_entity_state("sensor.a") == "1"
+
+
+def test_burst_is_applied_and_notified_once():
+    async def run() -> tuple[DashboardState, list[set[str]], str]:
+        state = DashboardState()
+        calls: list[set[str]] = []
+        state.add_ha_listener(calls.append)
+        for i in range(20):
+            state.update_ha_entity(f"sensor.e{i % 5}", {"state": str(i)})
+        before = state.get_entity_state("sensor.e0")
+        await asyncio.sleep(HA_UPDATE_WINDOW * 2)
+        return state, calls, before
+
+    state, calls, before = asyncio.run(run())
+    assert before == "unknown"
+    assert calls == [{f"sensor.e{i}" for i in range(5)}]
+    # Last write per entity wins
+    assert state.get_entity_state("sensor.e0") == "15"
+    assert state.get_entity_state("sensor.e4") == "19"
+
+
+def test_sorted_service_names_tracks_new_services():
+    state = DashboardState()
+    state.update_service("pv-forecast", {"status": "online"})
+    state.update_service("dashboard", {"status": "online"})
+    names = state.sorted_service_names()
+    assert names == ("dashboard", "pv-forecast")
+    # A repeat heartbeat keeps the cached tuple
+    state.update_service("dashboard", {"status": "offline"})
+    assert state.sorted_service_names() is names
+
+
+def test_get_entity_float_uses_parsed_state():
+    state = DashboardState()
+    state.update_ha_entity("sensor.power", {"state": "1234.5"})
+    state.update_ha_entity("sensor.off", {"state": "unavailable"})
+    assert state.get_entity_float("sensor.power") == 1234.5
+    assert state.get_entity_float("sensor.off", default=-1.0) == -1.0
+    assert state.get_entity_float("sensor.missing", default=2.0) == 2.0
+
+
+def test_option_set_follows_the_given_snapshot():
+    state = DashboardState()
+    state.update_ha_entity("input_select.mode", {
+        "state": "Auto", "attributes": {"options": ["Auto", "Manual"]},
+    })
+    snap = state.snapshot(["input_select.mode"])["input_select.mode"]
+    assert state.get_entity_option_set("input_select.mode", snap) == {"Auto", "Manual"}
+    # A later update must not leak into a render working from the old snapshot
+    state.update_ha_entity("input_select.mode", {
+        "state": "Off", "attributes": {"options": ["Off"]},
+    })
+    assert state.get_entity_option_set("input_select.mode", snap) == {"Auto", "Manual"}
+    assert state.get_entity_option_set("input_select.mode") == {"Off"}
+
+
+def test_version_changes_only_for_updated_sections():
+    state = DashboardState()
+    services = state.version("services")
+    ev = state.version("ev", "ha")
+    state.update_service("dashboard", {"status": "online"})
+    assert state.version("services") != services
+    assert state.version("ev", "ha") == ev
+    state.update_ha_entity("sensor.a", {"state": "1"})
+    assert state.version("ev", "ha") != ev
+
+
+def test_entity_groups_bump_only_matching_sections():
+    state = DashboardState()
+    state.register_entity_group("energy", frozenset({"sensor.pv", "sensor.grid"}))
+    state.register_entity_group("pv_forecast", frozenset({"sensor.pv_today"}))
+    energy, forecast = state.version("energy"), state.version("pv_forecast")
+    state.update_ha_entity("sensor.grid", {"state": "-300"})
+    assert state.version("energy") == energy + 1
+    assert state.version("pv_forecast") == forecast
+
+
+def test_online_count_follows_status_changes():
+    state = DashboardState()
+    state.update_service("a", {"status": "online"})
+    state.update_service("b", {"status": "online"})
+    state.update_service("a", {"status": "online"})
+    assert state.online_count == 2
+    state.update_service("b", {"status": "offline"})
+    assert state.online_count == 1
+    state.update_service("b", {"status": "online"})
+    assert state.online_count == 2
+
+
+def test_update_service_preformats_uptime():
+    state = DashboardState()
+    state.update_service("a", {"status": "online", "uptime_seconds": 7200})
+    state.update_service("b", {"status": "online"})
+    assert state.services["a"].uptime_str == "2.0h"
+    assert state.services["b"].uptime_str == "0s"
+
+
+def test_format_uptime_units():
+    assert format_uptime(59.9) == "59s"
+    assert format_uptime(125) == "2m"
+    assert format_uptime(5400) == "1.5h"
+    assert format_uptime(3 * 86400) == "3.0d"
+
+
+def test_service_and_entity_views_are_copy_on_write():
+    state = DashboardState()
+    state.update_service("a", {"status": "online"})
+    state.update_ha_entity("sensor.a", {"state": "1"})
+    services, entities = state.services, state.ha_entities
+    state.update_service("b", {"status": "online"})
+    state.update_ha_entity("sensor.a", {"state": "2"})
+    # Earlier views are untouched
+    assert list(services) == ["a"]
+    assert entities["sensor.a"]["state"] == "1"
+    assert state.ha_entities["sensor.a"]["state"] == "2"
+
+
+def test_change_listeners_fire_once_per_ha_flush():
+    async def run() -> int:
+        state = DashboardState()
+        calls: list[None] = []
+        state.add_change_listener(lambda: calls.append(None))
+        for i in range(10):
+            state.update_ha_entity("sensor.a", {"state": str(i)})
+        await asyncio.sleep(HA_UPDATE_WINDOW * 2)
+        state.update_pv_forecast({"today_kwh": 12.0})
+        return len(calls)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_registered_formats_render_on_update():
+    state = DashboardState()
+    state.register_entity_format("w_abs", ["sensor.grid"])
+    state.register_entity_format("kwh", ["sensor.pv_today"])
+    assert state.get_entity_formatted("sensor.grid") == "0"
+    state.update_ha_entity("sensor.grid", {"state": "-1234.4"})
+    state.update_ha_entity("sensor.pv_today", {"state": "unavailable"})
+    assert state.get_entity_formatted("sensor.grid") == "1,234"
+    assert state.get_entity_formatted("sensor.pv_today") == "0.0"
+
+
+def test_chat_history_is_bounded_and_tracks_totals():
+    state = DashboardState()
+    for i in range(CHAT_HISTORY_LIMIT + 5):
+        state.add_chat_message("user", f"m{i}")
+    assert len(state.chat_messages) == CHAT_HISTORY_LIMIT
+    assert state.chat_messages[0]["content"] == "m5"
+    assert [m["content"] for m in state.get_recent_messages(2)] == [
+        f"m{CHAT_HISTORY_LIMIT + 3}", f"m{CHAT_HISTORY_LIMIT + 4}",
+    ]
+    # A reader that fell behind gets only what is still retained
+    new, total = state.chat_messages_since(0)
+    assert total == CHAT_HISTORY_LIMIT + 5
+    assert len(new) == CHAT_HISTORY_LIMIT
+    state.add_chat_message("assistant", "latest")
+    new, total = state.chat_messages_since(total)
+    assert [m["content"] for m in new] == ["latest"]
+
+
+def test_status_and_state_strings_are_interned():
+    state = DashboardState()
+    state.update_service("a", {"status": "".join(["on", "line"])})
+    state.update_ha_entity("switch.a", {"state": "".join(["o", "n"])})
+    assert state.services["a"].status is sys.intern("online")
+    assert state.ha_entities["switch.a"]["state"] is sys.intern("on")
+
+
+def test_state_float_parsing():
+    parse = DashboardState.state_float
+    assert parse({"state": "230.5"}) == 230.5
+    assert parse({"state": 12.0}) == 12.0
+    assert parse({"state": "on"}, default=-1.0) == -1.0
+    assert parse({"state": ["not", "a", "number"]}) == 0.0
+    assert parse({}, default=3.0) == 3.0
@@ -1,7 +1,27 @@
 """Service-specific settings for ev-forecast."""
 
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import Any
+
+from pydantic import field_validator
+
 from shared.config import Settings as BaseSettings
 
+# Day abbreviations -> date.weekday() (locale-independent, unlike strftime("%a"))
+_WEEKDAY_MAP = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+
+@dataclass(frozen=True, slots=True)
+class AudiAccount:
+    """One Audi Connect account used for cloud refresh."""
+
+    name: str
+    vin: str
+
 
 class EVForecastSettings(BaseSettings):
     """Configuration for the EV forecast and charging planner.
@@ -51,6 +71,14 @@ class EVForecastSettings(BaseSettings):
     audi_account2_name: str = "Nicole"
     audi_account2_vin: str = ""
 
+    @cached_property
+    def audi_accounts(self) -> tuple[AudiAccount, ...]:
+        """Configured Audi accounts; account 2 only in dual-account mode with a VIN."""
+        accounts = [AudiAccount(self.audi_account1_name, self.audi_account1_vin)]
+        if not self.audi_single_account and self.audi_account2_vin:
+            accounts.append(AudiAccount(self.audi_account2_name, self.audi_account2_vin))
+        return tuple(accounts)
+
     # --- Refresh intervals ---
     audi_refresh_interval_minutes: int = 30  # How often to try refreshing data
     audi_stale_threshold_minutes: int = 60  # Data older than this triggers refresh
@@ -63,6 +91,17 @@ class EVForecastSettings(BaseSettings):
         ""  # Calendar for writing EV charging plan events (separate from family)
     )
 
+    @cached_property
+    def google_credentials_info(self) -> dict[str, Any] | None:
+        """Service-account info from the JSON setting (base64 or raw), decoded on first use."""
+        raw = self.google_calendar_credentials_json
+        if not raw:
+            return None
+        try:
+            return json.loads(base64.b64decode(raw))
+        except ValueError:
+            return json.loads(raw)
+
     # --- Trip prediction ---
     # Calendar event prefixes for identifying who drives
     calendar_prefix_henning: str = "H:"
@@ -70,20 +109,68 @@ class EVForecastSettings(BaseSettings):
 
     # Nicole's default commute (Mon-Thu) in km one way
     nicole_commute_km: float = 22.0
-    nicole_commute_days: str = "mon,tue,wed,thu"  # comma-separated
+    nicole_commute_days: str = "mon,tue,wed,thu"  # comma-separated, validated at load
     nicole_departure_time: str = "07:00"
     nicole_arrival_time: str = "18:00"
 
     # Henning thresholds for train vs car
     henning_train_threshold_km: float = 350.0
 
-    # Known destinations with one-way distances (km) — JSON string
+    # Known destinations with one-way distances (km) — JSON in the env var
     # Format: {"Münster": 60, "Aachen": 80, "STR": 500, "Stuttgart": 500, ...}
-    known_destinations: str = '{"Münster": 60, "Muenster": 60, "MS": 60, "Aachen": 80, "AC": 80, "Köln": 100, "Koeln": 100, "Düsseldorf": 80, "Duesseldorf": 80, "Dortmund": 80, "STR": 500, "Stuttgart": 500, "MUC": 500, "München": 500, "Muenchen": 500, "Berlin": 450, "BER": 450, "Hamburg": 300, "HAM": 300, "Frankfurt": 250, "FRA": 250, "Lengerich": 22, "Hopsten": 14, "Ibbenbüren": 10, "Ibbenbueren": 10, "Kathrin": 14, "Mareike": 10, "Vanne": 263}'
-
-    # Activities where the person does NOT use the EV (e.g. takes bike) — JSON string
+    known_destinations: dict[str, float] = {
+        "Münster": 60, "Muenster": 60, "MS": 60,
+        "Aachen": 80, "AC": 80,
+        "Köln": 100, "Koeln": 100,
+        "Düsseldorf": 80, "Duesseldorf": 80,
+        "Dortmund": 80,
+        "STR": 500, "Stuttgart": 500,
+        "MUC": 500, "München": 500, "Muenchen": 500,
+        "Berlin": 450, "BER": 450,
+        "Hamburg": 300, "HAM": 300,
+        "Frankfurt": 250, "FRA": 250,
+        "Lengerich": 22,
+        "Hopsten": 14,
+        "Ibbenbüren": 10, "Ibbenbueren": 10,
+        "Kathrin": 14,
+        "Mareike": 10,
+        "Vanne": 263,
+    }
+
+    # Activities where the person does NOT use the EV (e.g. takes bike) — JSON
     # Format: {"Kegeln": "Henning"} means Henning bikes to Kegeln
-    no_ev_activities: str = '{"Kegeln": "Henning"}'
+    no_ev_activities: dict[str, str] = {"Kegeln": "Henning"}
+
+    @field_validator("known_destinations", "no_ev_activities", mode="before")
+    @classmethod
+    def _parse_json_mapping(cls, value: Any) -> Any:
+        """Accept the mappings as JSON strings too (e.g. passed in code)."""
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    @field_validator("nicole_commute_days")
+    @classmethod
+    def _normalize_commute_days(cls, value: str) -> str:
+        """Lower-case and strip the day list; reject unknown day names early."""
+        days = [d.strip().lower() for d in value.split(",") if d.strip()]
+        unknown = [d for d in days if d not in _WEEKDAY_MAP]
+        if unknown:
+            raise ValueError(f"unknown weekday(s) {unknown}, expected {'/'.join(_WEEKDAY_MAP)}")
+        return ",".join(days)
+
+    @cached_property
+    def commute_weekdays(self) -> frozenset[int]:
+        """Nicole's commute days as date.weekday() values (0=Mon..6=Sun)."""
+        if not self.nicole_commute_days:
+            return frozenset()
+        return frozenset(_WEEKDAY_MAP[d] for d in self.nicole_commute_days.split(","))
+
+    @field_validator("nicole_departure_time", "nicole_arrival_time")
+    @classmethod
+    def _validate_hhmm(cls, value: str) -> str:
+        """Reject malformed HH:MM values at load instead of at predictor start."""
+        return datetime.strptime(value.strip(), "%H:%M").strftime("%H:%M")
 
     # --- Geocoding for unknown destinations ---
     # Home coordinates (auto-detected from HA if 0)
@@ -18,7 +18,6 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
 import sys
 import traceback
 
@@ -107,7 +106,7 @@ def check_config() -> dict:
             warn("No calendar ID — trip prediction from calendar will be skipped")
 
         # Show known destinations
-        destinations = json.loads(s.known_destinations)
+        destinations = s.known_destinations
         info(f"Known destinations: {len(destinations)}", ", ".join(destinations.keys()))
 
         return {"settings": s}
@@ -217,16 +216,8 @@ async def check_audi(settings) -> None:
             active_account_entity=settings.ev_active_account_entity,
         )
         refresh_configs = [
-            RefreshConfig(
-                name=settings.audi_account1_name, vin=settings.audi_account1_vin
-            ),
+            RefreshConfig(name=acc.name, vin=acc.vin) for acc in settings.audi_accounts
         ]
-        if not settings.audi_single_account and settings.audi_account2_vin:
-            refresh_configs.append(
-                RefreshConfig(
-                    name=settings.audi_account2_name, vin=settings.audi_account2_vin
-                ),
-            )
         monitor = VehicleMonitor(
             ha,
             vehicle_config,
@@ -297,22 +288,16 @@ async def check_calendar(settings) -> None:
         return
 
     try:
-        import base64
-
         scopes = ["https://www.googleapis.com/auth/calendar.readonly"]
         creds_file = settings.google_calendar_credentials_file
-        creds_json = settings.google_calendar_credentials_json
 
         if creds_file and Path(creds_file).exists():
             creds = Credentials.from_service_account_file(creds_file, scopes=scopes)
             result("Credentials loaded", True, f"From file: {creds_file}")
-        elif creds_json:
-            try:
-                raw = base64.b64decode(creds_json)
-                creds_info = json.loads(raw)
-            except Exception:
-                creds_info = json.loads(creds_json)
-            creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
+        elif settings.google_calendar_credentials_json:
+            creds = Credentials.from_service_account_info(
+                settings.google_credentials_info, scopes=scopes
+            )
             result("Credentials loaded", True, "From JSON env var")
         else:
             result(
@@ -444,16 +429,8 @@ async def check_plan(settings) -> None:
             active_account_entity=settings.ev_active_account_entity,
         )
         refresh_configs = [
-            RefreshConfig(
-                name=settings.audi_account1_name, vin=settings.audi_account1_vin
-            ),
+            RefreshConfig(name=acc.name, vin=acc.vin) for acc in settings.audi_accounts
         ]
-        if not settings.audi_single_account and settings.audi_account2_vin:
-            refresh_configs.append(
-                RefreshConfig(
-                    name=settings.audi_account2_name, vin=settings.audi_account2_vin
-                ),
-            )
         monitor = VehicleMonitor(
             ha,
             vehicle_config,
@@ -485,13 +462,11 @@ async def check_plan(settings) -> None:
         )
 
         # Set up trip predictor
-        known_destinations = json.loads(settings.known_destinations)
-        commute_days = [d.strip() for d in settings.nicole_commute_days.split(",")]
         predictor = TripPredictor(
-            known_destinations=known_destinations,
+            known_destinations=settings.known_destinations,
             consumption_kwh_per_100km=settings.ev_consumption_kwh_per_100km,
             nicole_commute_km=settings.nicole_commute_km,
-            nicole_commute_days=commute_days,
+            nicole_commute_weekdays=settings.commute_weekdays,
             nicole_departure_time=settings.nicole_departure_time,
             nicole_arrival_time=settings.nicole_arrival_time,
             henning_train_threshold_km=settings.henning_train_threshold_km,
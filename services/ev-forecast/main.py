@@ -132,18 +132,9 @@ class EVForecastService:
 
         # Build refresh configs based on account mode
         refresh_configs = [
-            RefreshConfig(
-                name=self.settings.audi_account1_name,
-                vin=self.settings.audi_account1_vin,
-            ),
+            RefreshConfig(name=acc.name, vin=acc.vin)
+            for acc in self.settings.audi_accounts
         ]
-        if not self.settings.audi_single_account and self.settings.audi_account2_vin:
-            refresh_configs.append(
-                RefreshConfig(
-                    name=self.settings.audi_account2_name,
-                    vin=self.settings.audi_account2_vin,
-                ),
-            )
         self.vehicle = VehicleMonitor(
             ha=self.ha,
             vehicle_config=vehicle_config,
@@ -262,13 +253,11 @@ class EVForecastService:
             else None
         )
 
-        known_destinations = json.loads(self.settings.known_destinations)
-        commute_days = [d.strip() for d in self.settings.nicole_commute_days.split(",")]
         self.trips = TripPredictor(
-            known_destinations=known_destinations,
+            known_destinations=self.settings.known_destinations,
             consumption_kwh_per_100km=self.settings.ev_consumption_kwh_per_100km,
             nicole_commute_km=self.settings.nicole_commute_km,
-            nicole_commute_days=commute_days,
+            nicole_commute_weekdays=self.settings.commute_weekdays,
             nicole_departure_time=self.settings.nicole_departure_time,
             nicole_arrival_time=self.settings.nicole_arrival_time,
             henning_train_threshold_km=self.settings.henning_train_threshold_km,
@@ -277,7 +266,7 @@ class EVForecastService:
             timezone=self.settings.timezone,
             geo_distance=geo,
             learned_destinations=self.learned_destinations,
-            no_ev_activities=json.loads(self.settings.no_ev_activities),
+            no_ev_activities=self.settings.no_ev_activities,
         )
 
         # Load persisted state (before first vehicle read)
@@ -1366,7 +1355,6 @@ class EVForecastService:
             return
 
         try:
-            import base64
             from google.oauth2.service_account import Credentials
             from googleapiclient.discovery import build
 
@@ -1376,17 +1364,13 @@ class EVForecastService:
             ]
 
             creds_file = self.settings.google_calendar_credentials_file
-            creds_json = self.settings.google_calendar_credentials_json
 
             if creds_file and Path(creds_file).exists():
                 creds = Credentials.from_service_account_file(creds_file, scopes=scopes)
-            elif creds_json:
-                try:
-                    raw = base64.b64decode(creds_json)
-                    info = json.loads(raw)
-                except Exception:
-                    info = json.loads(creds_json)
-                creds = Credentials.from_service_account_info(info, scopes=scopes)
+            elif self.settings.google_calendar_credentials_json:
+                creds = Credentials.from_service_account_info(
+                    self.settings.google_credentials_info, scopes=scopes,
+                )
             else:
                 logger.info("google_calendar_no_credentials")
                 return
@@ -18,6 +18,7 @@ import asyncio
 import json
 import math
 import re
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from datetime import date, datetime, time, timedelta
 from typing import Any
@@ -26,8 +27,16 @@ from zoneinfo import ZoneInfo
 import httpx
 import structlog
 
+try:
+    import ahocorasick
+except ImportError:  # optional; falls back to a linear substring scan
+    ahocorasick = None
+
 logger = structlog.get_logger()
 
+# Separates destination keys in the joined search string
+_KEY_SEP = "\x00"
+
 # --- Activity words that should NOT be geocoded ---
 ACTIVITY_WORDS = {
     "kegeln", "bowling", "schwimmen", "yoga", "sport", "training",
@@ -192,7 +201,7 @@ class TripPredictor:
         known_destinations: dict[str, float],
         consumption_kwh_per_100km: float = 22.0,
         nicole_commute_km: float = 22.0,
-        nicole_commute_days: list[str] | None = None,
+        nicole_commute_weekdays: frozenset[int] | None = None,
         nicole_departure_time: str = "07:00",
         nicole_arrival_time: str = "18:00",
         henning_train_threshold_km: float = 350.0,
@@ -204,12 +213,16 @@ class TripPredictor:
         no_ev_activities: dict[str, str] | None = None,
     ) -> None:
         self._destinations = {k.lower(): v for k, v in known_destinations.items()}
+        self._rebuild_destination_index()
         # Activities where specific people don't use EV (e.g. {"Kegeln": "Henning"})
         self._no_ev_activities = {k.lower(): v.lower() for k, v in (no_ev_activities or {}).items()}
         self._consumption = consumption_kwh_per_100km
         self._default_consumption = consumption_kwh_per_100km
         self._nicole_commute_km = nicole_commute_km
-        self._nicole_commute_days = nicole_commute_days or ["mon", "tue", "wed", "thu"]
+        # date.weekday() values (0=Mon..6=Sun); defaults to Mon-Thu
+        self._commute_weekdays = (
+            frozenset({0, 1, 2, 3}) if nicole_commute_weekdays is None else nicole_commute_weekdays
+        )
         self._nicole_departure = self._parse_time(nicole_departure_time)
         self._nicole_arrival = self._parse_time(nicole_arrival_time)
         self._henning_train_km = henning_train_threshold_km
@@ -377,6 +390,7 @@ class TripPredictor:
 
                         # Cache in known destinations for future lookups
                         self._destinations[destination.lower().strip()] = geo_km
+                        self._rebuild_destination_index()
                         logger.info(
                             "destination_geocoded",
                             person=person,
@@ -579,9 +593,9 @@ class TripPredictor:
             return self._destinations[dest_lower]
 
         # Partial match in config destinations
-        for city, distance in self._destinations.items():
-            if city in dest_lower or dest_lower in city:
-                return distance
+        distance = self._partial_destination_match(dest_lower)
+        if distance is not None:
+            return distance
 
         # 2. Check learned destinations (from orchestrator knowledge store)
         if self._learned:
@@ -596,6 +610,54 @@ class TripPredictor:
 
         return None
 
+    def _rebuild_destination_index(self) -> None:
+        """Index destination keys for substring matching in both directions.
+
+        Keys contained in a destination are found with one Aho-Corasick pass
+        (when pyahocorasick is installed); a destination contained in a key
+        with a single ``str.find`` over all keys joined together.
+        """
+        keys = list(self._destinations)
+        self._dest_keys = keys
+        self._dest_joined = _KEY_SEP.join(keys)
+        self._dest_offsets = []
+        offset = 0
+        for key in keys:
+            self._dest_offsets.append(offset)
+            offset += len(key) + len(_KEY_SEP)
+        self._dest_automaton = None
+        # An empty key would match every destination; skip it in both paths
+        if ahocorasick is not None and any(keys):
+            automaton = ahocorasick.Automaton()
+            for i, key in enumerate(keys):
+                if key:
+                    automaton.add_word(key, i)
+            automaton.make_automaton()
+            self._dest_automaton = automaton
+
+    def _partial_destination_match(self, dest_lower: str) -> float | None:
+        """Distance of the first key (config order) that contains, or is
+        contained in, *dest_lower*."""
+        best: int | None = None
+        if self._dest_automaton is not None:
+            for _, i in self._dest_automaton.iter(dest_lower):
+                if best is None or i < best:
+                    best = i
+        else:
+            for i, key in enumerate(self._dest_keys):
+                if key and key in dest_lower:
+                    best = i
+                    break
+        if self._dest_keys and _KEY_SEP not in dest_lower:
+            pos = self._dest_joined.find(dest_lower)
+            if pos >= 0:
+                i = bisect_right(self._dest_offsets, pos) - 1
+                if best is None or i < best:
+                    best = i
+        if best is None:
+            return None
+        return self._destinations[self._dest_keys[best]]
+
     def _get_multiday_phase(self, event: dict[str, Any], target_date: date) -> str:
         """Determine the phase of a multi-day event for a given date.
 
@@ -707,10 +769,7 @@ class TripPredictor:
 
     def _is_commute_day(self, d: date) -> bool:
         """Check if this is one of Nicole's commute days."""
-        # Use weekday() (0=Mon..6=Sun) instead of locale-dependent strftime("%a")
-        weekday_map = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
-        commute_weekdays = {weekday_map[day] for day in self._nicole_commute_days if day in weekday_map}
-        return d.weekday() in commute_weekdays
+        return d.weekday() in self._commute_weekdays
 
     def _make_commute_trip(self, d: date) -> Trip:
         """Create Nicole's default commute trip."""
@@ -17,14 +17,39 @@ Usage:
 
     # Get all states
     states = await ha.get_states()
+
+    # Stream state changes for a set of entities (WebSocket API)
+    async for entity_id, new_state in ha.watch_states(["sensor.temperature_living_room"]):
+        ...
 """
 
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from typing import Any
 
 import httpx
 
+try:
+    import websockets
+except ImportError:
+    websockets = None  # type: ignore[assignment]
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 support)
+
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 from shared.log import get_logger
 from shared.retry import async_retry
 
@@ -34,12 +59,26 @@ logger = get_logger("ha-client")
 class HomeAssistantClient:
     """Async Home Assistant REST API client."""
 
-    def __init__(self, url: str, token: str) -> None:
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        max_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+    ) -> None:
         self.url = url.rstrip("/")
+        self._token = token
         self._headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
+        # Keep idle connections open longer than typical poll intervals
+        # (httpx's default 5 s expiry reconnects on every 10 s poll).
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
         self._client: httpx.AsyncClient | None = None
 
     async def _get_client(self) -> httpx.AsyncClient:
@@ -48,6 +87,11 @@ class HomeAssistantClient:
                 base_url=f"{self.url}/api",
                 headers=self._headers,
                 timeout=30.0,
+                limits=self._limits,
+                # Negotiated via ALPN on https:// (e.g. HA behind a TLS
+                # reverse proxy), multiplexing concurrent requests over one
+                # connection; plain http:// stays on HTTP/1.1 keep-alive.
+                http2=_HTTP2_AVAILABLE,
             )
         return self._client
 
@@ -61,21 +105,21 @@ class HomeAssistantClient:
         client = await self._get_client()
         resp = await client.get(f"/states/{entity_id}")
         resp.raise_for_status()
-        return resp.json()
+        return _loads(resp.content)
 
     async def get_states(self) -> list[dict[str, Any]]:
         """Get all entity states."""
         client = await self._get_client()
         resp = await client.get("/states")
         resp.raise_for_status()
-        return resp.json()
+        return _loads(resp.content)
 
     async def get_services(self) -> list[dict[str, Any]]:
         """Get all available service domains and services."""
         client = await self._get_client()
         resp = await client.get("/services")
         resp.raise_for_status()
-        return resp.json()
+        return _loads(resp.content)
 
     @async_retry(max_retries=2, base_delay=1.0, exceptions=(httpx.ConnectError, httpx.ConnectTimeout))
     async def call_service(
@@ -116,7 +160,7 @@ class HomeAssistantClient:
         client = await self._get_client()
         resp = await client.get(path, params=params)
         resp.raise_for_status()
-        return resp.json()
+        return _loads(resp.content)
 
     async def get_camera_image(self, entity_id: str) -> bytes | None:
         """Fetch a camera snapshot as raw JPEG bytes via the HA camera proxy.
@@ -133,3 +177,54 @@ class HomeAssistantClient:
         except Exception as exc:
             logger.warning("camera_proxy_exception", entity_id=entity_id, error=str(exc))
             return None
+
+    async def watch_states(
+        self,
+        entity_ids: Iterable[str],
+        on_subscribed: Callable[[], Awaitable[None]] | None = None,
+    ) -> AsyncIterator[tuple[str, dict[str, Any] | None]]:
+        """Stream state changes for *entity_ids* over the WebSocket API.
+
+        Subscribes a state trigger for the given entities and yields
+        ``(entity_id, new_state)`` for every state or attribute change;
+        ``new_state`` is None when the entity was removed. *on_subscribed* is
+        awaited once the subscription is active, e.g. to seed current states
+        without missing changes. Runs until the connection drops, which
+        surfaces as an exception.
+        """
+        if websockets is None:
+            raise RuntimeError("websockets is not installed")
+
+        ws_url = self.url.replace("http://", "ws://", 1).replace("https://", "wss://", 1)
+        entity_ids = list(entity_ids)
+        async with websockets.connect(f"{ws_url}/api/websocket", max_size=None) as ws:
+            msg = _loads(await ws.recv())
+            if msg.get("type") != "auth_required":
+                raise RuntimeError(f"Unexpected initial message: {msg.get('type')}")
+            await ws.send(json.dumps({"type": "auth", "access_token": self._token}))
+            msg = _loads(await ws.recv())
+            if msg.get("type") != "auth_ok":
+                raise PermissionError(f"WebSocket auth failed: {msg.get('message', 'unknown error')}")
+
+            await ws.send(json.dumps({
+                "id": 1,
+                "type": "subscribe_trigger",
+                "trigger": {"platform": "state", "entity_id": entity_ids},
+            }))
+            msg = _loads(await ws.recv())
+            if not msg.get("success"):
+                err = (msg.get("error") or {}).get("message", "unknown error")
+                raise RuntimeError(f"subscribe_trigger failed: {err}")
+            logger.info("state_subscription_active", entity_count=len(entity_ids))
+
+            if on_subscribed is not None:
+                await on_subscribed()
+
+            async for raw in ws:
+                msg = _loads(raw)
+                if msg.get("type") != "event":
+                    continue
+                trigger = msg.get("event", {}).get("variables", {}).get("trigger", {})
+                entity_id = trigger.get("entity_id")
+                if entity_id:
+                    yield entity_id, trigger.get("to_state")
@@ -28,23 +28,86 @@ Usage:
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Any, Iterator
 
 from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.flux_table import TableList
+from influxdb_client.client.flux_table import FluxRecord, TableList
 from influxdb_client.client.write_api import SYNCHRONOUS
 
 from shared.log import get_logger
 
 logger = get_logger("influx-client")
 
+# Bucket, tag and field values are passed as Flux parameters (option
+# statements in the request's extern AST), never interpolated. The query
+# text then only depends on the time range and which filters are active,
+# so it is assembled once per shape and reused — it also keeps quoting out
+# of the picture and lets InfluxDB reuse the parsed query.
+
+_MEASUREMENT_FILTER = '  |> filter(fn: (r) => r["_measurement"] == _measurement)'
+_ENTITY_FILTER = '  |> filter(fn: (r) => r["entity_id"] == _entity_id)'
+_FIELD_FILTER = '  |> filter(fn: (r) => r["_field"] == _field)'
+
+
+@lru_cache(maxsize=512)
+def _build_flux(
+    range_start: str,
+    range_stop: str,
+    by_measurement: bool,
+    by_entity: bool,
+    by_field: bool,
+) -> str:
+    """Build (and cache) the Flux text for InfluxClient.query_records."""
+    lines = [
+        "from(bucket: _bucket)",
+        f"  |> range(start: {range_start}, stop: {range_stop})",
+    ]
+    if by_measurement:
+        lines.append(_MEASUREMENT_FILTER)
+    if by_entity:
+        lines.append(_ENTITY_FILTER)
+    if by_field:
+        lines.append(_FIELD_FILTER)
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=512)
+def _build_mean_flux(range_start: str, window: str) -> str:
+    """Build (and cache) the Flux text for InfluxClient.query_mean."""
+    return f"""
+from(bucket: _bucket)
+  |> range(start: {range_start})
+  |> filter(fn: (r) => r["entity_id"] == _entity_id)
+  |> filter(fn: (r) => r["_field"] == "value")
+  |> aggregateWindow(every: {window}, fn: mean, createEmpty: false)
+  |> yield(name: "mean")
+""".strip()
+
 
 class InfluxClient:
     """Wrapper around InfluxDB v2 client with convenience methods."""
 
-    def __init__(self, url: str, token: str, org: str) -> None:
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        org: str,
+        timeout_ms: int = 30_000,
+        pool_maxsize: int = 16,
+    ) -> None:
         self.org = org
-        self._client = InfluxDBClient(url=url, token=token, org=org)
+        # One client per process; the urllib3 pool is sized so concurrent
+        # queries (e.g. via asyncio.to_thread) reuse keep-alive sockets
+        # instead of opening and discarding overflow connections.
+        self._client = InfluxDBClient(
+            url=url,
+            token=token,
+            org=org,
+            timeout=timeout_ms,
+            enable_gzip=True,  # annotated CSV compresses ~10x
+            connection_pool_maxsize=pool_maxsize,
+        )
         self._query_api = self._client.query_api()
         try:
             self._write_api = self._client.write_api(write_options=SYNCHRONOUS)
@@ -112,10 +175,26 @@ class InfluxClient:
                 timestamp=p.get("timestamp"),
             )
 
-    def query_raw(self, flux_query: str) -> TableList:
-        """Execute a raw Flux query and return tables."""
+    def query_raw(
+        self, flux_query: str, params: dict[str, Any] | None = None
+    ) -> TableList:
+        """Execute a raw Flux query and return tables.
+
+        ``params`` are bound as Flux variables (e.g. {"_bucket": "hass"}
+        is referenced as ``_bucket`` in the query).
+        """
         logger.debug("influx_query", query=flux_query[:200])
-        return self._query_api.query(flux_query, org=self.org)
+        return self._query_api.query(flux_query, org=self.org, params=params)
+
+    def query_raw_stream(
+        self, flux_query: str, params: dict[str, Any] | None = None
+    ) -> Iterator[FluxRecord]:
+        """Execute a raw Flux query and yield records as they are parsed.
+
+        Unlike query_raw, the response is never materialized as a TableList.
+        """
+        logger.debug("influx_query_stream", query=flux_query[:200])
+        return self._query_api.query_stream(flux_query, org=self.org, params=params)
 
     def query_records(
         self,
@@ -128,6 +207,30 @@ class InfluxClient:
     ) -> list[dict[str, Any]]:
         """Query records with common filters.
 
+        List-returning wrapper around query_records_iter().
+        """
+        return list(
+            self.query_records_iter(
+                bucket,
+                measurement=measurement,
+                entity_id=entity_id,
+                field=field,
+                range_start=range_start,
+                range_stop=range_stop,
+            )
+        )
+
+    def query_records_iter(
+        self,
+        bucket: str,
+        measurement: str | None = None,
+        entity_id: str | None = None,
+        field: str = "value",
+        range_start: str = "-1h",
+        range_stop: str = "now()",
+    ) -> Iterator[dict[str, Any]]:
+        """Stream records with common filters, one dict per record.
+
         Args:
             bucket: InfluxDB bucket name.
             measurement: Filter by _measurement (e.g., "kWh", "W", "°C").
@@ -139,33 +242,31 @@ class InfluxClient:
             range_start: Start of time range (Flux duration or timestamp).
             range_stop: End of time range.
 
-        Returns:
-            List of record dicts with _time, _value, and tag fields.
+        Yields:
+            Record dicts with _time, _value, and tag fields.
         """
-        filters = []
-        if measurement:
-            filters.append(
-                f'|> filter(fn: (r) => r["_measurement"] == "{measurement}")'
-            )
+        influx_entity_id = None
         if entity_id:
             # HA stores entity_id without domain prefix in InfluxDB
             # e.g. "sensor.inverter_pv_east_energy" → entity_id="inverter_pv_east_energy", domain="sensor"
             influx_entity_id = (
                 entity_id.split(".", 1)[-1] if "." in entity_id else entity_id
             )
-            filters.append(
-                f'|> filter(fn: (r) => r["entity_id"] == "{influx_entity_id}")'
-            )
-        if field:
-            filters.append(f'|> filter(fn: (r) => r["_field"] == "{field}")')
-
-        flux = f"""
-from(bucket: "{bucket}")
-  |> range(start: {range_start}, stop: {range_stop})
-  {chr(10).join(f"  {f}" for f in filters)}
-"""
-        tables = self.query_raw(flux.strip())
-        return [record.values for table in tables for record in table.records]
+        flux = _build_flux(
+            range_start,
+            range_stop,
+            bool(measurement),
+            bool(influx_entity_id),
+            bool(field),
+        )
+        params = {
+            "_bucket": bucket,
+            "_measurement": measurement or None,
+            "_entity_id": influx_entity_id,
+            "_field": field or None,
+        }
+        for record in self.query_raw_stream(flux, params):
+            yield record.values
 
     def query_mean(
         self,
@@ -178,13 +279,6 @@ from(bucket: "{bucket}")
         influx_entity_id = (
             entity_id.split(".", 1)[-1] if "." in entity_id else entity_id
         )
-        flux = f"""
-from(bucket: "{bucket}")
-  |> range(start: {range_start})
-  |> filter(fn: (r) => r["entity_id"] == "{influx_entity_id}")
-  |> filter(fn: (r) => r["_field"] == "value")
-  |> aggregateWindow(every: {window}, fn: mean, createEmpty: false)
-  |> yield(name: "mean")
-"""
-        tables = self.query_raw(flux.strip())
-        return [record.values for table in tables for record in table.records]
+        flux = _build_mean_flux(range_start, window)
+        params = {"_bucket": bucket, "_entity_id": influx_entity_id}
+        return [record.values for record in self.query_raw_stream(flux, params)]
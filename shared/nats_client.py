@@ -16,7 +16,10 @@ Or as context manager:
 from __future__ import annotations
 
 import asyncio
+import copy
 import json
+from collections.abc import Iterable
+from functools import lru_cache
 from typing import Any
 
 try:
@@ -28,17 +31,66 @@ except ImportError:
     nats = None  # type: ignore[assignment]
     _NATS_AVAILABLE = False
 
+try:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def _orjson_default(obj: Any) -> Any:
+        # json.dumps accepts float/int subclasses (e.g. numpy.float64 from
+        # sklearn scores); orjson does not, so hand it the plain value.
+        if isinstance(obj, float):
+            return float(obj)
+        if isinstance(obj, int):
+            return int(obj)
+        item = getattr(obj, "item", None)  # remaining numpy scalars
+        if callable(item):
+            return item()
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+    def _dumps(data: Any) -> bytes:
+        # OPT_NON_STR_KEYS keeps json.dumps' coercion of int/float dict keys
+        return orjson.dumps(data, default=_orjson_default, option=_ORJSON_OPTIONS)
+
+    _loads = orjson.loads
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+    def _dumps(data: Any) -> bytes:
+        return json.dumps(data).encode()
+
+    _loads = json.loads
+
 from shared.log import get_logger
 
 logger = get_logger("nats-publisher")
 
 
+@lru_cache(maxsize=256)
+def _discovery_subject(component: str, node_id: str, object_id: str) -> str:
+    if node_id:
+        return f"ha.discovery.{component}.{node_id}.{object_id}"
+    return f"ha.discovery.{component}.{object_id}"
+
+
 class NatsPublisher:
     """Lightweight fire-and-forget NATS publisher."""
 
+    # Upper bound on in-flight handler tasks for concurrent subscriptions
+    MAX_CONCURRENT_HANDLERS = 8
+    # Coalescing window for publish_deferred(), in seconds
+    DEFER_WINDOW = 0.1
+
     def __init__(self, url: str = "nats://nats:4222") -> None:
         self._url = url
         self._nc: Any | None = None
+        self._handler_slots = asyncio.Semaphore(self.MAX_CONCURRENT_HANDLERS)
+        self._handler_tasks: set[asyncio.Task] = set()
+        # subject -> (config snapshot, serialized payload)
+        self._discovery_payloads: dict[str, tuple[dict[str, Any], bytes]] = {}
+        # Ordered set of (subject, payload) waiting for the deferred flush
+        self._deferred: dict[tuple[str, bytes], None] = {}
+        self._deferred_flush: asyncio.TimerHandle | None = None
 
     @property
     def connected(self) -> bool:
@@ -93,12 +145,21 @@ class NatsPublisher:
 
     async def close(self) -> None:
         """Drain and close the NATS connection."""
+        if self._deferred_flush is not None:
+            # Send anything still waiting in the deferred window first
+            self._deferred_flush.cancel()
+            self._deferred_flush = None
+            batch, self._deferred = self._deferred, {}
+            if self.connected:
+                await self._publish_batch(list(batch))
         if self._nc is not None and not self._nc.is_closed:
             try:
                 await self._nc.drain()
             except Exception as exc:
                 logger.warning("nats_drain_failed", error=str(exc))
             self._nc = None
+        if self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
 
     async def publish(self, subject: str, data: dict[str, Any]) -> None:
         """Serialize data to JSON and publish to NATS subject.
@@ -110,7 +171,53 @@ class NatsPublisher:
             logger.warning("nats_publish_skipped_not_connected", subject=subject)
             return
         try:
-            payload = json.dumps(data).encode()
+            payload = _dumps(data)
+        except Exception as exc:
+            logger.warning("nats_publish_failed", subject=subject, error=str(exc))
+            return
+        await self._publish_bytes(subject, payload)
+
+    def publish_deferred(self, subject: str, data: dict[str, Any]) -> None:
+        """Queue a publish to go out with any others made within DEFER_WINDOW.
+
+        For user-triggered commands (UI buttons) where a few ms of latency
+        don't matter: the batch is written back to back in one flush, and an
+        identical (subject, payload) queued twice in the same window — e.g.
+        a double click — is sent once. Falls back to publish_sync() outside
+        a running event loop.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.publish_sync(subject, data)
+            return
+        try:
+            payload = _dumps(data)
+        except Exception as exc:
+            logger.warning("nats_publish_failed", subject=subject, error=str(exc))
+            return
+        self._deferred[(subject, payload)] = None
+        if self._deferred_flush is None:
+            self._deferred_flush = loop.call_later(
+                self.DEFER_WINDOW, self._flush_deferred
+            )
+
+    def _flush_deferred(self) -> None:
+        self._deferred_flush = None
+        batch, self._deferred = self._deferred, {}
+        if not self.connected:
+            logger.warning("nats_publish_skipped_not_connected", count=len(batch))
+            return
+        task = asyncio.create_task(self._publish_batch(list(batch)))
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def _publish_batch(self, batch: list[tuple[str, bytes]]) -> None:
+        for subject, payload in batch:
+            await self._publish_bytes(subject, payload)
+
+    async def _publish_bytes(self, subject: str, payload: bytes) -> None:
+        try:
             await self._nc.publish(subject, payload)  # type: ignore[union-attr]
             logger.debug("nats_published", subject=subject, bytes=len(payload))
         except Exception as exc:
@@ -124,23 +231,68 @@ class NatsPublisher:
         await self._nc.subscribe(subject, cb=callback)  # type: ignore[union-attr]
         logger.info("nats_subscribed", subject=subject)
 
-    async def subscribe_json(self, subject: str, callback) -> None:
-        """Subscribe to a subject; callback receives (subject: str, payload: dict)."""
+    async def subscribe_json(
+        self, subject: str, callback, concurrent: bool = False
+    ) -> None:
+        """Subscribe to a subject; callback receives (subject: str, payload: dict).
+
+        nats-py delivers a subscription's messages one at a time, so a slow
+        callback backs up every later message on that subject. With
+        ``concurrent=True`` each message is handled in its own task (at most
+        MAX_CONCURRENT_HANDLERS in flight per publisher) — only use it for
+        callbacks that don't rely on message order.
+        """
         if not self.connected:
             logger.warning("nats_subscribe_skipped_not_connected", subject=subject)
             return
+        await self._subscribe_json(subject, callback, concurrent)
+        logger.info("nats_subscribed", subject=subject)
+
+    async def subscribe_json_many(
+        self,
+        handlers: Iterable[tuple[str, Any]],
+        concurrent: bool = False,
+    ) -> None:
+        """Subscribe several (subject, callback) pairs in one go.
+
+        Same semantics as subscribe_json() for each pair. nats-py queues the
+        SUB commands and writes them to the socket together on its next
+        flush; this logs a single line for the whole set.
+        """
+        handlers = list(handlers)
+        if not self.connected:
+            logger.warning(
+                "nats_subscribe_skipped_not_connected",
+                subjects=[subject for subject, _ in handlers],
+            )
+            return
+        for subject, callback in handlers:
+            await self._subscribe_json(subject, callback, concurrent)
+        logger.info("nats_subscribed", subjects=[subject for subject, _ in handlers])
 
-        async def _wrapper(msg: Any) -> None:
+    async def _subscribe_json(self, subject: str, callback, concurrent: bool) -> None:
+        async def _handle(msg: Any) -> None:
             try:
-                data = json.loads(msg.data.decode())
+                data = _loads(msg.data)
                 await callback(msg.subject, data)
             except Exception as exc:
                 logger.warning(
                     "nats_callback_failed", subject=msg.subject, error=str(exc)
                 )
 
-        await self._nc.subscribe(subject, cb=_wrapper)  # type: ignore[union-attr]
-        logger.info("nats_subscribed", subject=subject)
+        async def _dispatch(msg: Any) -> None:
+            # Waiting for a free slot here applies backpressure to delivery
+            await self._handler_slots.acquire()
+            task = asyncio.create_task(_handle(msg))
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_done)
+
+        cb = _dispatch if concurrent else _handle
+        await self._nc.subscribe(subject, cb=cb)  # type: ignore[union-attr]
+
+    def _handler_done(self, task: asyncio.Task) -> None:
+        self._handler_tasks.discard(task)
+        self._handler_slots.release()
 
     async def publish_ha_discovery(
         self,
@@ -156,11 +308,23 @@ class NatsPublisher:
         producing homeassistant/{component}/{node_id}/{object_id}/config.
         Pass node_id="" to omit the node segment.
         """
-        if node_id:
-            subject = f"ha.discovery.{component}.{node_id}.{object_id}"
+        if not self.connected:
+            logger.warning("nats_publish_skipped_not_connected", component=component)
+            return
+        subject = _discovery_subject(component, node_id, object_id)
+        # Discovery is republished on every (re)start with the same configs;
+        # reuse the serialized payload while the config is unchanged.
+        cached = self._discovery_payloads.get(subject)
+        if cached is not None and cached[0] == config:
+            payload = cached[1]
         else:
-            subject = f"ha.discovery.{component}.{object_id}"
-        await self.publish(subject, config)
+            try:
+                payload = _dumps(config)
+            except Exception as exc:
+                logger.warning("nats_publish_failed", subject=subject, error=str(exc))
+                return
+            self._discovery_payloads[subject] = (copy.deepcopy(config), payload)
+        await self._publish_bytes(subject, payload)
 
     async def publish_status(self, service_name: str, data: dict[str, Any]) -> None:
         """Publish service status to energy.{service_name}.status."""
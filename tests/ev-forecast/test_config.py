@@ -0,0 +1,94 @@
+"""Tests for EVForecastSettings parsing."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+
+import pytest
+
+_CONFIG_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "services", "ev-forecast", "config.py")
+)
+
+# Loaded under a unique name: other services also have a top-level ``config``
+_spec = importlib.util.spec_from_file_location("ev_forecast_config", _CONFIG_PATH)
+_config = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_config)
+EVForecastSettings = _config.EVForecastSettings
+
+
+@pytest.fixture(autouse=True)
+def _clean_env(monkeypatch):
+    monkeypatch.delenv("KNOWN_DESTINATIONS", raising=False)
+    monkeypatch.delenv("NO_EV_ACTIVITIES", raising=False)
+
+
+def test_default_mappings_are_parsed():
+    s = EVForecastSettings(_env_file=None)
+    assert s.known_destinations["Münster"] == 60.0
+    assert s.no_ev_activities == {"Kegeln": "Henning"}
+
+
+def test_mappings_from_env_json(monkeypatch):
+    monkeypatch.setenv("KNOWN_DESTINATIONS", '{"Rheine": 30}')
+    monkeypatch.setenv("NO_EV_ACTIVITIES", '{"Tennis": "Nicole"}')
+    s = EVForecastSettings(_env_file=None)
+    assert s.known_destinations == {"Rheine": 30.0}
+    assert s.no_ev_activities == {"Tennis": "Nicole"}
+
+
+def test_mappings_accept_json_strings():
+    s = EVForecastSettings(_env_file=None, known_destinations='{"Aachen": 80}')
+    assert s.known_destinations == {"Aachen": 80.0}
+
+
+def test_commute_days_are_normalized():
+    s = EVForecastSettings(_env_file=None, nicole_commute_days=" Mon, TUE ,wed,")
+    assert s.nicole_commute_days == "mon,tue,wed"
+    assert s.commute_weekdays == frozenset({0, 1, 2})
+    assert EVForecastSettings(_env_file=None, nicole_commute_days="").commute_weekdays == frozenset()
+
+
+def test_commute_days_reject_unknown_names():
+    with pytest.raises(ValueError):
+        EVForecastSettings(_env_file=None, nicole_commute_days="mon,funday")
+
+
+def test_commute_times_are_validated():
+    s = EVForecastSettings(_env_file=None, nicole_departure_time=" 7:05")
+    assert s.nicole_departure_time == "07:05"
+    with pytest.raises(ValueError):
+        EVForecastSettings(_env_file=None, nicole_arrival_time="18h")
+
+
+def test_audi_accounts_follow_account_mode():
+    single = EVForecastSettings(_env_file=None, audi_account2_vin="WAU2")
+    assert [a.name for a in single.audi_accounts] == ["Henning"]
+    dual = EVForecastSettings(
+        _env_file=None, audi_single_account=False, audi_account1_vin="WAU1",
+        audi_account2_vin="WAU2",
+    )
+    assert [(a.name, a.vin) for a in dual.audi_accounts] == [
+        ("Henning", "WAU1"), ("Nicole", "WAU2"),
+    ]
+    assert dual.audi_accounts is dual.audi_accounts
+
+
+def test_no_per_account_entity_fields():
+    # Per-account sensors were folded into the combined ev_*_entity fields
+    stale = [
+        name for name in EVForecastSettings.model_fields
+        if name.startswith("audi_account") and name.endswith("_entity")
+    ]
+    assert stale == []
+
+
+def test_google_credentials_info_decodes_base64_or_raw_json():
+    import base64
+
+    raw = '{"type": "service_account"}'
+    assert EVForecastSettings(_env_file=None).google_credentials_info is None
+    for value in (raw, base64.b64encode(raw.encode()).decode()):
+        s = EVForecastSettings(_env_file=None, google_calendar_credentials_json=value)
+        assert s.google_credentials_info == {"type": "service_account"}
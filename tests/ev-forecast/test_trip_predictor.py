@@ -6,6 +6,7 @@ import pytest
 from datetime import date, timedelta
 
 # conftest.py already sets sys.path; import here after path is set
+import trips
 from trips import TripPredictor
 
 
@@ -13,7 +14,7 @@ def make_predictor(
     known_destinations: dict | None = None,
     consumption: float = 22.0,
     nicole_commute_km: float = 22.0,
-    nicole_commute_days: list[str] | None = None,
+    nicole_commute_weekdays: frozenset[int] | None = None,
     henning_train_threshold_km: float = 350.0,
 ) -> TripPredictor:
     """Create a TripPredictor with sensible test defaults."""
@@ -32,7 +33,7 @@ def make_predictor(
         known_destinations=known_destinations,
         consumption_kwh_per_100km=consumption,
         nicole_commute_km=nicole_commute_km,
-        nicole_commute_days=nicole_commute_days or ["mon", "tue", "wed", "thu"],
+        nicole_commute_weekdays=nicole_commute_weekdays,
         henning_train_threshold_km=henning_train_threshold_km,
         timezone="Europe/Berlin",
     )
@@ -163,7 +164,7 @@ async def test_commute_trip_has_correct_distance():
 @pytest.mark.asyncio
 async def test_no_commute_on_weekend():
     """Nicole has no default commute on weekends (Sat/Sun)."""
-    predictor = make_predictor(nicole_commute_days=["mon", "tue", "wed", "thu"])
+    predictor = make_predictor(nicole_commute_weekdays=frozenset({0, 1, 2, 3}))
     # Find a Saturday or Sunday in the next 7 days
     today = date.today()
     weekend_day = None
@@ -200,6 +201,34 @@ async def test_known_destination_uses_lookup_distance():
     assert henning_trips[0].distance_km == 14.0
 
 
+def test_lookup_distance_partial_match_in_config_order():
+    """Partial matches work both ways and the first configured key wins."""
+    predictor = make_predictor()
+    # Key contained in the destination
+    assert predictor._lookup_distance("Uni Münster Hörsaal") == 60.0
+    # Destination contained in a key
+    assert predictor._lookup_distance("ster") == 60.0
+    # Both Hamburg and STR occur; Hamburg comes first in config order
+    assert predictor._lookup_distance("Hamburg STR") == 300.0
+    assert predictor._lookup_distance("Nowhere") is None
+
+
+@pytest.mark.parametrize("use_automaton", [True, False])
+def test_lookup_distance_partial_match_paths_agree(monkeypatch, use_automaton):
+    """The linear fallback matches like Aho-Corasick and ignores empty keys."""
+    if use_automaton:
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(trips, "ahocorasick", None)
+    predictor = make_predictor(
+        known_destinations={"": 5.0, "Münster": 60.0, "Hamburg": 300.0, "STR": 500.0}
+    )
+    assert (predictor._dest_automaton is not None) is use_automaton
+    assert predictor._lookup_distance("Uni Münster Hörsaal") == 60.0
+    assert predictor._lookup_distance("Hamburg STR") == 300.0
+    assert predictor._lookup_distance("Nowhere") is None
+
+
 @pytest.mark.asyncio
 async def test_unknown_destination_uses_default_distance():
     """An unknown destination (no geocoding available) falls back to 50 km."""
@@ -318,7 +347,7 @@ async def test_energy_estimate_matches_consumption_rate():
 @pytest.mark.asyncio
 async def test_no_trips_plan_has_no_calendar_trips():
     """With no calendar events and on a weekend, the plan has no trips."""
-    predictor = make_predictor(nicole_commute_days=[])  # Disable commute
+    predictor = make_predictor(nicole_commute_weekdays=frozenset())  # Disable commute
     today = date.today()
     plans = await predictor.predict_trips([], days=1)
     assert len(plans) == 1
@@ -0,0 +1,82 @@
+"""Tests for shared.ha_client."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from shared.ha_client import HomeAssistantClient
+
+websockets = pytest.importorskip("websockets")
+
+
+def _event(entity_id: str, to_state: dict | None) -> str:
+    return json.dumps({
+        "id": 1,
+        "type": "event",
+        "event": {"variables": {"trigger": {
+            "platform": "state",
+            "entity_id": entity_id,
+            "from_state": None,
+            "to_state": to_state,
+        }}},
+    })
+
+
+async def _serve(handler):
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def test_watch_states_subscribes_and_yields_changes():
+    received: list[dict] = []
+
+    async def handler(ws):
+        await ws.send(json.dumps({"type": "auth_required"}))
+        received.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps({"type": "auth_ok"}))
+        received.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps({"id": 1, "type": "result", "success": True}))
+        await ws.send(json.dumps({"id": 1, "type": "pong"}))
+        await ws.send(_event("sensor.a", {"state": "1"}))
+        await ws.send(_event("sensor.b", None))
+
+    server, url = await _serve(handler)
+    seeded: list[bool] = []
+
+    async def on_subscribed() -> None:
+        seeded.append(True)
+
+    ha = HomeAssistantClient(url, "tok")
+    try:
+        events = [
+            ev async for ev in ha.watch_states(["sensor.a", "sensor.b"], on_subscribed)
+        ]
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert received[0] == {"type": "auth", "access_token": "tok"}
+    assert received[1]["type"] == "subscribe_trigger"
+    assert received[1]["trigger"] == {"platform": "state", "entity_id": ["sensor.a", "sensor.b"]}
+    assert seeded == [True]
+    assert events == [("sensor.a", {"state": "1"}), ("sensor.b", None)]
+
+
+async def test_watch_states_rejects_bad_token():
+    async def handler(ws):
+        await ws.send(json.dumps({"type": "auth_required"}))
+        await ws.recv()
+        await ws.send(json.dumps({"type": "auth_invalid", "message": "Invalid access token"}))
+
+    server, url = await _serve(handler)
+    ha = HomeAssistantClient(url, "bad")
+    try:
+        with pytest.raises(PermissionError, match="Invalid access token"):
+            async for _ in ha.watch_states(["sensor.a"]):
+                pass
+    finally:
+        server.close()
+        await server.wait_closed()
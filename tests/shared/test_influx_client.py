@@ -0,0 +1,89 @@
+"""Tests for shared.influx_client."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from shared.influx_client import InfluxClient, _build_flux
+
+
+def _records(*values: dict) -> list[MagicMock]:
+    return [MagicMock(values=v) for v in values]
+
+
+@pytest.fixture
+def influx():
+    client = InfluxClient(url="http://influx.test:8086", token="t", org="homelab")
+    client._query_api = MagicMock()
+    yield client
+    client.close()
+
+
+def test_query_records_strips_domain_and_flattens(influx):
+    influx._query_api.query_stream.return_value = iter(
+        _records({"_value": 1.0}, {"_value": 2.0}, {"_value": 3.0})
+    )
+    records = influx.query_records(
+        bucket="hass", entity_id="sensor.pv_east", range_start="-24h",
+    )
+    assert [r["_value"] for r in records] == [1.0, 2.0, 3.0]
+    call = influx._query_api.query_stream.call_args
+    flux = call.args[0]
+    assert "from(bucket: _bucket)" in flux
+    assert "range(start: -24h, stop: now())" in flux
+    assert 'r["entity_id"] == _entity_id' in flux
+    assert 'r["_field"] == _field' in flux
+    assert "_measurement" not in flux
+    assert call.kwargs["params"] == {
+        "_bucket": "hass",
+        "_measurement": None,
+        "_entity_id": "pv_east",
+        "_field": "value",
+    }
+
+
+def test_records_flux_is_cached(influx):
+    influx._query_api.query_stream.side_effect = lambda *a, **kw: iter(())
+    _build_flux.cache_clear()
+    influx.query_records(bucket="hass", entity_id="sensor.a")
+    influx.query_records(bucket="hass", entity_id="sensor.a")
+    influx.query_records(bucket="hass", entity_id="sensor.b")
+    info = _build_flux.cache_info()
+    # Entity IDs are parameters, so both entities share one query text
+    assert info.hits == 2
+    assert info.misses == 1
+    first, _, third = influx._query_api.query_stream.call_args_list
+    assert first.args[0] == third.args[0]
+    assert third.kwargs["params"]["_entity_id"] == "b"
+
+
+def test_query_mean_builds_window_query(influx):
+    influx._query_api.query_stream.return_value = iter(_records({"_value": 4.5}))
+    records = influx.query_mean(
+        bucket="hass", entity_id="sensor.temp", range_start="-7d", window="1d",
+    )
+    assert records == [{"_value": 4.5}]
+    call = influx._query_api.query_stream.call_args
+    assert 'r["entity_id"] == _entity_id' in call.args[0]
+    assert "aggregateWindow(every: 1d, fn: mean" in call.args[0]
+    assert call.kwargs["params"] == {"_bucket": "hass", "_entity_id": "temp"}
+
+
+def test_params_are_not_interpolated(influx):
+    influx._query_api.query_stream.return_value = iter(())
+    influx.query_records(bucket="hass", entity_id='sensor.x") or (r) => true //')
+    call = influx._query_api.query_stream.call_args
+    assert "or (r)" not in call.args[0]
+    assert call.kwargs["params"]["_entity_id"] == 'x") or (r) => true //'
+
+
+def test_query_records_iter_is_lazy(influx):
+    influx._query_api.query_stream.return_value = iter(
+        _records({"_value": 1.0}, {"_value": 2.0})
+    )
+    it = influx.query_records_iter(bucket="hass", entity_id="sensor.a")
+    influx._query_api.query_stream.assert_not_called()
+    assert next(it) == {"_value": 1.0}
+    assert list(it) == [{"_value": 2.0}]
@@ -0,0 +1,142 @@
+"""Tests for shared.nats_client."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from shared.nats_client import NatsPublisher
+
+
+@pytest.fixture
+def publisher():
+    pub = NatsPublisher(url="nats://nats.test:4222")
+    nc = MagicMock()
+    nc.is_closed = False
+    nc.publish = AsyncMock()
+    nc.subscribe = AsyncMock()
+    pub._nc = nc
+    return pub
+
+
+async def test_publish_serializes_to_json_bytes(publisher, monkeypatch):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    await publisher.publish("energy.test", {"kwh": 1.5, 3: "x"})
+    subject, payload = publisher._nc.publish.await_args.args
+    assert subject == "energy.test"
+    assert isinstance(payload, bytes)
+    assert json.loads(payload) == {"kwh": 1.5, "3": "x"}
+
+
+async def test_publish_serializes_numpy_scalars(publisher, monkeypatch):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    await publisher.publish(
+        "energy.pv.forecast.model_trained",
+        {"r2": round(np.float64(0.91234), 4), "samples": np.int64(42)},
+    )
+    _, payload = publisher._nc.publish.await_args.args
+    assert json.loads(payload) == {"r2": 0.9123, "samples": 42}
+
+
+async def test_subscribe_json_decodes_payload(publisher, monkeypatch):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    callback = AsyncMock()
+    await publisher.subscribe_json("energy.>", callback)
+    wrapper = publisher._nc.subscribe.await_args.kwargs["cb"]
+
+    await wrapper(MagicMock(subject="energy.pv", data=b'{"today_kwh": 12.5}'))
+    callback.assert_awaited_once_with("energy.pv", {"today_kwh": 12.5})
+
+
+async def test_subscribe_json_swallows_bad_payload(publisher, monkeypatch):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    callback = AsyncMock()
+    await publisher.subscribe_json("energy.>", callback)
+    wrapper = publisher._nc.subscribe.await_args.kwargs["cb"]
+
+    await wrapper(MagicMock(subject="energy.pv", data=b"not json"))
+    callback.assert_not_awaited()
+
+
+async def test_subscribe_json_concurrent_runs_handlers_in_parallel(
+    publisher, monkeypatch
+):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    release = asyncio.Event()
+    started: list[str] = []
+
+    async def slow(subject: str, payload: dict) -> None:
+        started.append(payload["id"])
+        await release.wait()
+
+    await publisher.subscribe_json("ev.>", slow, concurrent=True)
+    wrapper = publisher._nc.subscribe.await_args.kwargs["cb"]
+
+    await wrapper(MagicMock(subject="ev.a", data=b'{"id": "a"}'))
+    await wrapper(MagicMock(subject="ev.b", data=b'{"id": "b"}'))
+    await asyncio.sleep(0)
+    assert started == ["a", "b"]
+    assert len(publisher._handler_tasks) == 2
+
+    release.set()
+    await asyncio.gather(*publisher._handler_tasks)
+    assert not publisher._handler_tasks
+
+
+async def test_publish_ha_discovery_reuses_serialized_payload(
+    publisher, monkeypatch
+):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    dumps = MagicMock(side_effect=lambda d: json.dumps(d).encode())
+    monkeypatch.setattr("shared.nats_client._dumps", dumps)
+    config = {"name": "Uptime", "device": {"identifiers": ["x"]}}
+
+    await publisher.publish_ha_discovery("sensor", "uptime", "dash", config)
+    await publisher.publish_ha_discovery("sensor", "uptime", "dash", dict(config))
+    assert dumps.call_count == 1
+    first, second = publisher._nc.publish.await_args_list
+    assert first.args == second.args
+    assert first.args[0] == "ha.discovery.sensor.dash.uptime"
+
+    config["device"]["identifiers"].append("y")
+    await publisher.publish_ha_discovery("sensor", "uptime", "dash", config)
+    assert dumps.call_count == 2
+    assert json.loads(publisher._nc.publish.await_args.args[1]) == config
+
+
+async def test_publish_ha_discovery_without_node(publisher, monkeypatch):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    await publisher.publish_ha_discovery("switch", "pump", "", {"name": "Pump"})
+    assert publisher._nc.publish.await_args.args[0] == "ha.discovery.switch.pump"
+
+
+async def test_publish_deferred_batches_and_dedups(publisher, monkeypatch):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    publisher.DEFER_WINDOW = 0.01
+    publisher.publish_deferred("cmd.pv", {"command": "refresh"})
+    publisher.publish_deferred("cmd.pv", {"command": "retrain"})
+    publisher.publish_deferred("cmd.pv", {"command": "refresh"})
+    publisher._nc.publish.assert_not_awaited()
+
+    await asyncio.sleep(0.05)
+    sent = [(c.args[0], json.loads(c.args[1])) for c in publisher._nc.publish.await_args_list]
+    assert sent == [
+        ("cmd.pv", {"command": "refresh"}),
+        ("cmd.pv", {"command": "retrain"}),
+    ]
+
+
+async def test_subscribe_json_many_subscribes_each_subject(publisher, monkeypatch):
+    monkeypatch.setattr("shared.nats_client._NATS_AVAILABLE", True)
+    first, second = AsyncMock(), AsyncMock()
+    await publisher.subscribe_json_many([("a.>", first), ("b.x", second)])
+    calls = publisher._nc.subscribe.await_args_list
+    assert [c.args[0] for c in calls] == ["a.>", "b.x"]
+
+    await calls[1].kwargs["cb"](MagicMock(subject="b.x", data=b'{"v": 1}'))
+    second.assert_awaited_once_with("b.x", {"v": 1})
+    first.assert_not_awaited()